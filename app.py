@@ -1,11 +1,33 @@
 import streamlit as st
-import pandas as pd
+import hashlib
 import json
 import os
-from fuzzywuzzy import process, fuzz
-import plotly.express as px
 import io
-import base64
+import time
+
+from company_matching import (DEFAULT_MEMORY_BUDGET_MB, IdealIndex, company_names, contact_emails,
+                              estimate_matches, find_company_column, get_job, start_job)
+from lazy_imports import lazy_module
+from contact_store import compact_frame, is_columnar_file, read_columnar
+
+# Streamlit reruns this script on every interaction; only load pandas once a match needs it
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+
+# Score histograms use fixed-width bins from the threshold to 100 so sources line up
+SCORE_BINS = 10
+
+# Seconds between reruns while a background match job is running
+JOB_POLL_SECONDS = 1.0
+
+# Partial results shown while a job runs
+PARTIAL_ROWS_SHOWN = 100
+
+# Ideal-list indexes shared by all sessions; past this many the least recently used is dropped
+MAX_SHARED_INDEXES = 4
+
+# Seconds a shared index stays cached after it was built
+SHARED_INDEX_TTL_SECONDS = 3600
 
 # Set page configuration
 st.set_page_config(
@@ -27,13 +49,13 @@ with st.sidebar:
     #### 1️⃣ Ideal Contact List
     Upload your master/target contact list (e.g., from your CRM)
     """)
-    ideal_file = st.file_uploader("Choose your ideal contacts CSV file", type=["csv"])
+    ideal_file = st.file_uploader("Choose your ideal contacts file", type=["csv", "parquet", "feather"])
     
     st.markdown("""
     #### 2️⃣ Source Contact Lists
     Upload one or more contact lists to compare against your ideal list
     """)
-    source_files = st.file_uploader("Choose source contacts CSV file(s)", type=["csv"], accept_multiple_files=True)
+    source_files = st.file_uploader("Choose source contacts file(s)", type=["csv", "parquet", "feather"], accept_multiple_files=True)
 
 # App title and description
 st.title("Contacts Matcher 5000")
@@ -49,12 +71,12 @@ st.markdown("""
 This app allows you to compare contact databases across different sources and identify overlapping company relationships.
 
 ### Getting Started
-1. Upload your ideal contact list CSV file
-2. Upload one or more source contact list CSV files
+1. Upload your ideal contact list (CSV, Parquet or Feather)
+2. Upload one or more source contact lists (CSV, Parquet or Feather)
 3. Configure the matching settings
 4. View and download the results
 
-**Note:** This app processes data only in your browser. No data is stored on our servers.
+**Note:** Uploaded files are processed in memory for your session only. They are not saved or shared with other users, and temporary files a large match spills to disk are deleted as soon as its results are shown or it is cancelled.
 
 ### Expected CSV Format
 Your CSV files should contain columns for:
@@ -86,40 +108,30 @@ DEFAULT_SETTINGS = {
         "Company": "Company Name",
         "Position": "Job Title",
         "Department": "Job Function"
-    }
+    },
+    "memory_budget_mb": DEFAULT_MEMORY_BUDGET_MB,
+    "time_budget_seconds": 0,
+    "company_aliases": False
 }
 
-# Function to normalize company names
-def normalize_company_name(name):
-    if not isinstance(name, str):
-        return ""
-    
-    # Convert to lowercase
-    name = name.lower()
-    
-    # Remove common suffixes
-    suffixes = [" inc", " inc.", " incorporated", " llc", " ltd", " limited", " corp", " corp.", " corporation"]
-    for suffix in suffixes:
-        if name.endswith(suffix):
-            name = name[:-len(suffix)]
-    
-    # Remove punctuation and extra whitespace
-    import re
-    name = re.sub(r'[^\w\s]', '', name)
-    name = re.sub(r'\s+', ' ', name).strip()
-    
-    return name
-
 # Function to try reading CSV files with different encodings and delimiters
 @st.cache_data
 def try_read_csv(uploaded_file):
-    """Try to read a CSV file with different encodings and delimiters"""
+    """Try to read a CSV file with different encodings and delimiters (Parquet/Feather are read directly)"""
     encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252', 'macroman']
     delimiters = [',', ';', '\t']
     
     # Get the file content
     content = uploaded_file.getvalue()
     
+    # Columnar uploads need no encoding or delimiter guessing
+    if is_columnar_file(uploaded_file.name):
+        try:
+            return read_columnar(io.BytesIO(content), uploaded_file.name)
+        except Exception as e:
+            st.error(f"Failed to read {uploaded_file.name}: {e}")
+            return None
+    
     for encoding in encodings:
         for delimiter in delimiters:
             try:
@@ -129,78 +141,116 @@ def try_read_csv(uploaded_file):
                 df.columns = [col.strip() for col in df.columns]
                 
                 # Drop unnamed columns
-                df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+                df = df.loc[:, ~df.columns.str.contains('^Unnamed')].copy()
                 
-                return df
+                # Store repetitive columns as categoricals
+                return compact_frame(df)
             except Exception as e:
                 continue
     
     st.error(f"Failed to read {uploaded_file.name} with all encodings and delimiters")
     return None
 
-# Function to match companies
-def match_companies(ideal_df, source_df, company_threshold, column_mapping):
-    """Match companies between ideal and source dataframes"""
-    matches = []
+# Function to identify an upload by its content
+def upload_hash(uploaded_file):
+    return hashlib.sha1(uploaded_file.getvalue()).hexdigest()
+
+# Function to get the ideal-list index shared by every session
+@st.cache_resource(max_entries=MAX_SHARED_INDEXES, ttl=SHARED_INDEX_TTL_SECONDS, show_spinner="Indexing the ideal list...")
+def shared_ideal_index(ideal_key, _ideal_df, ideal_company_col, aliases=False):
+    """Build the IdealIndex for an ideal file once per content hash (ideal_key) and alias setting for the whole server.
     
+    The index is read-only once built, so concurrent sessions and their match
+    jobs use the same copy. Jobs hold their own reference, so one that
+    outlives eviction keeps its index until it finishes.
+    """
+    return IdealIndex(company_names(_ideal_df, ideal_company_col), contact_emails(_ideal_df), aliases)
+
+# Function to turn (source row, ideal row, score) matches into result records
+def match_records(found, ideal_df, source_df, ideal_company_col, source_company_col):
+    ideal_names = company_names(ideal_df, ideal_company_col)
+    source_names = company_names(source_df, source_company_col)
+    return [{
+        "ideal_idx": ideal_idx,
+        "source_idx": source_idx,
+        "ideal_company": ideal_names[ideal_idx],
+        "source_company": source_names[source_idx],
+        "score": score
+    } for source_idx, ideal_idx, score in found]
+
+# Function to match companies
+def match_companies(ideal_df, source_df, company_threshold, column_mapping, one_to_one=False,
+                    memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, time_budget_seconds=0, ideal_key=None, aliases=False):
+    """Start matching companies between ideal and source dataframes; returns the background job"""
     # Debug prints
     st.write("Ideal DataFrame columns:", ideal_df.columns.tolist())
     st.write("Source DataFrame columns:", source_df.columns.tolist())
     st.write("Column mapping:", column_mapping)
     
     # Get company name columns - look for mapped columns first, then try defaults
-    source_company_col = next((col for col in source_df.columns if col in ["Company", "Company Name"]), None)
+    source_company_col = find_company_column(source_df)
     if not source_company_col:
         st.error("Could not find a company name column in the source file. Please ensure it contains 'Company' or 'Company Name'.")
-        return []
+        return None
     
-    ideal_company_col = next((col for col in ideal_df.columns if col in ["Company", "Company Name"]), None)
+    ideal_company_col = find_company_column(ideal_df)
     if not ideal_company_col:
         st.error("Could not find a company name column in the ideal file. Please ensure it contains 'Company' or 'Company Name'.")
-        return []
+        return None
     
     st.write("Using columns:", ideal_company_col, "and", source_company_col)
     
-    # Normalize company names
-    ideal_companies = {idx: normalize_company_name(name) for idx, name in enumerate(ideal_df[ideal_company_col])}
-    source_companies = {idx: normalize_company_name(name) for idx, name in enumerate(source_df[source_company_col])}
-    
-    # Create a list of normalized ideal company names for fuzzy matching
-    ideal_company_names = list(ideal_companies.values())
-    
-    # For each source company, find the best match in the ideal list
-    for source_idx, source_company in source_companies.items():
-        if not source_company:
-            continue
-            
-        # Find the best match
-        best_match, score = process.extractOne(source_company, ideal_company_names, scorer=fuzz.token_sort_ratio)
-        
-        if score >= company_threshold:
-            # Find the index of the best match in the ideal list
-            ideal_idx = [idx for idx, name in ideal_companies.items() if name == best_match][0]
-            
-            # Get the original company names
-            original_ideal_name = ideal_df.iloc[ideal_idx][ideal_company_col]
-            original_source_name = source_df.iloc[source_idx][source_company_col]
-            
-            matches.append({
-                "ideal_idx": ideal_idx,
-                "source_idx": source_idx,
-                "ideal_company": original_ideal_name,
-                "source_company": original_source_name,
-                "score": score
-            })
-    
-    return matches
+    # Join on employer email domain (and company aliases, if enabled) first, then find the best
+    # ideal match per source company, skipping ideal names whose length rules out the threshold
+    if ideal_key is None:
+        index = IdealIndex(company_names(ideal_df, ideal_company_col), contact_emails(ideal_df), aliases)
+    else:
+        index = shared_ideal_index(ideal_key, ideal_df, ideal_company_col, aliases)
+    return start_job(index, company_names(source_df, source_company_col), company_threshold,
+                     contact_emails(source_df), one_to_one, memory_budget_mb, time_budget_seconds or None)
 
 # Function to generate a download link for a dataframe
 def get_download_link(df, filename, link_text):
+    import base64
     csv = df.to_csv(index=False)
     b64 = base64.b64encode(csv.encode()).decode()
     href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">{link_text}</a>'
     return href
 
+# Function to generate a download link for a dataframe as Parquet
+def get_parquet_download_link(df, filename, link_text):
+    import base64
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    b64 = base64.b64encode(buffer.getvalue()).decode()
+    href = f'<a href="data:application/octet-stream;base64,{b64}" download="{filename}">{link_text}</a>'
+    return href
+
+# Function to bin match scores server-side so charts only carry the bar heights
+def score_histogram(scores, low, bins=SCORE_BINS):
+    """Count integer scores into at most `bins` equal-width bins from low to 100"""
+    scores = np.asarray(scores, dtype=np.int64)
+    low = int(min(low, scores.min())) if len(scores) else int(low)
+    # Whole-number edges, so no bin gets more distinct scores than another
+    width = max(1, -(-(101 - low) // bins))
+    edges = np.arange(low, 101 + width, width)
+    counts, edges = np.histogram(scores, bins=edges)
+    stops = np.minimum(edges[1:] - 1, 100)
+    return pd.DataFrame({
+        "bin": [f"{start}-{stop}" if stop > start else f"{start}" for start, stop in zip(edges[:-1], stops)],
+        "bin_start": edges[:-1],
+        "count": counts
+    })
+
+# Function to summarize match scores per group (source file, company...)
+def score_summary(matches_df, by):
+    """Match count and score spread per group, largest groups first"""
+    return (matches_df.groupby(by, observed=True)["score"]
+            .agg(matches="size", mean="mean", median="median", min="min", max="max")
+            .round(1)
+            .sort_values("matches", ascending=False)
+            .reset_index())
+
 # Sidebar for file uploads and settings
 with st.sidebar:
     st.header("Matching Settings")
@@ -212,6 +262,41 @@ with st.sidebar:
     person_threshold = st.slider("Person Name Matching Threshold", 50, 100, DEFAULT_SETTINGS["thresholds"]["person_name"],
                                help="Higher values require closer matches for person names.")
     
+    # Predict match counts and run time from a sample before committing to a full run
+    if ideal_file is not None and source_files:
+        estimates = st.session_state.setdefault("estimates", {})
+        estimate_thresholds = sorted(set(range(max(50, company_threshold - 10), 101, 5)) | {company_threshold})
+        estimate_ideal_key = upload_hash(ideal_file)
+        # The alias setting lives under Advanced Settings, further down the sidebar
+        estimate_aliases = st.session_state.get("company_aliases", DEFAULT_SETTINGS["company_aliases"])
+        if st.button("Estimate matches", help="Matches a random sample of each source file against the whole "
+                                                 "ideal list to predict match counts and run time."):
+            estimate_ideal_df = try_read_csv(ideal_file)
+            estimate_ideal_col = find_company_column(estimate_ideal_df) if estimate_ideal_df is not None else None
+            if estimate_ideal_col is not None:
+                with st.spinner("Matching a sample..."):
+                    estimate_index = shared_ideal_index(estimate_ideal_key, estimate_ideal_df, estimate_ideal_col,
+                                                        estimate_aliases)
+                    for source_file in source_files:
+                        estimate_source_df = try_read_csv(source_file)
+                        estimate_source_col = find_company_column(estimate_source_df) if estimate_source_df is not None else None
+                        if estimate_source_col is not None:
+                            estimates[(estimate_ideal_key, upload_hash(source_file), estimate_aliases)] = estimate_matches(
+                                estimate_index, company_names(estimate_source_df, estimate_source_col),
+                                estimate_thresholds, contact_emails(estimate_source_df))
+        for source_file in source_files:
+            estimate = estimates.get((estimate_ideal_key, upload_hash(source_file), estimate_aliases))
+            # Estimates cover the thresholds around the slider when they were made
+            if estimate is not None and company_threshold in estimate.expected:
+                expected, margin = estimate.expected[company_threshold]
+                st.caption(f"{source_file.name}: about {expected:,.0f} ± {margin:,.0f} of {estimate.total:,} contacts "
+                           f"match at {company_threshold}; a full run takes about {estimate.seconds:,.0f}s "
+                           f"(from {estimate.sample_size:,} sampled contacts)")
+                st.dataframe(pd.DataFrame({
+                    "threshold": list(estimate.expected),
+                    "expected matches": [round(value) for value, _ in estimate.expected.values()]
+                }), hide_index=True)
+    
     # Advanced settings expander
     with st.expander("Advanced Settings"):
         email_threshold = st.slider("Email Matching Threshold", 50, 100, DEFAULT_SETTINGS["thresholds"]["email"],
@@ -220,6 +305,18 @@ with st.sidebar:
                                   help="Lower values allow matching similar job titles.")
         department_threshold = st.slider("Department Matching Threshold", 50, 100, DEFAULT_SETTINGS["thresholds"]["department"],
                                        help="Lower values allow matching similar department names.")
+        one_to_one = st.checkbox("One-to-one company matching", False,
+                                 help="Each ideal company is matched by at most one source company name, "
+                                      "choosing among each name's top candidates by score.")
+        company_aliases = st.checkbox("Join on company aliases", DEFAULT_SETTINGS["company_aliases"], key="company_aliases",
+                                      help="Source companies listed in company_aliases.json (e.g. \"IBM\") match the "
+                                           "ideal company with the same canonical name at 100, without fuzzy scoring.")
+        memory_budget_mb = st.number_input("Memory budget (MB)", 64, 65536, DEFAULT_SETTINGS["memory_budget_mb"], 64,
+                                           help="Matching sizes its chunks to fit and moves intermediate "
+                                                "results to temporary files beyond this.")
+        time_budget_seconds = st.number_input("Time budget (seconds)", 0, 3600, DEFAULT_SETTINGS["time_budget_seconds"],
+                                              help="0 means no limit. Otherwise exact matches come first and fuzzy "
+                                                   "matching stops at the budget; you can continue refining afterwards.")
 
 # Main content
 if ideal_file is not None and len(source_files) > 0:
@@ -236,6 +333,35 @@ if ideal_file is not None and len(source_files) > 0:
         # Process each source file
         all_matches = {}
         
+        # Scores of every source matched against this ideal list, kept across reruns for the summary
+        if st.session_state.get("score_ideal_file") != ideal_file.name:
+            st.session_state["score_ideal_file"] = ideal_file.name
+            st.session_state["source_scores"] = {}
+        
+        # Match results per (ideal content, source content, threshold, one-to-one, aliases), so reruns reuse them
+        match_cache = st.session_state.setdefault("match_cache", {})
+        # Background job IDs under the same keys while they run
+        match_jobs = st.session_state.setdefault("match_jobs", {})
+        jobs_running = False
+        ideal_key = upload_hash(ideal_file)
+        
+        # Start a background job per source against the shared index; the loop below follows each one
+        if len(source_files) > 1 and st.button("Match all sources", key="match_all"):
+            for source_file in source_files:
+                source_df = try_read_csv(source_file)
+                if source_df is None:
+                    continue
+                if find_company_column(source_df) is None:
+                    st.warning(f"Skipping {source_file.name}: no 'Company' or 'Company Name' column")
+                    continue
+                job = match_companies(ideal_df, source_df, company_threshold, {}, one_to_one,
+                                      memory_budget_mb, time_budget_seconds, ideal_key, company_aliases)
+                if job is None:
+                    break
+                match_key = (ideal_key, upload_hash(source_file), company_threshold, one_to_one, company_aliases)
+                match_cache.pop(match_key, None)
+                match_jobs[match_key] = job.id
+        
         for source_file in source_files:
             source_df = try_read_csv(source_file)
             
@@ -277,12 +403,65 @@ if ideal_file is not None and len(source_files) > 0:
                             column_mapping[source_col] = ideal_col
                 
                 # Match button
+                match_key = (ideal_key, upload_hash(source_file), company_threshold, one_to_one, company_aliases)
                 if st.button(f"Match with {source_file.name}", key=f"match_{source_file.name}"):
-                    # Show progress
-                    with st.spinner(f"Matching companies in {source_file.name}..."):
-                        # Perform matching
-                        matches = match_companies(ideal_df, source_df, company_threshold, column_mapping)
-                        all_matches[source_file.name] = matches
+                    # Matching runs in the background; this script only polls it
+                    job = match_companies(ideal_df, source_df, company_threshold, column_mapping, one_to_one,
+                                          memory_budget_mb, time_budget_seconds, ideal_key, company_aliases)
+                    if job is not None:
+                        match_cache.pop(match_key, None)
+                        match_jobs[match_key] = job.id
+                
+                # Follow this source's background job until it finishes
+                job = get_job(match_jobs.get(match_key))
+                if job is not None:
+                    ideal_company_col = find_company_column(ideal_df)
+                    source_company_col = find_company_column(source_df)
+                    if job.running:
+                        jobs_running = True
+                        eta = job.eta()
+                        st.progress(job.fraction(), text=(
+                            f"Matching {source_file.name}: {job.done:,} of {job.total:,} contacts, "
+                            f"{job.pairs_scored:,} pairs scored" + (f", about {eta:.0f}s left" if eta is not None else "")
+                        ))
+                        st.caption(f"{job.found_count:,} matches so far")
+                        partial = match_records(job.results(last=PARTIAL_ROWS_SHOWN), ideal_df, source_df,
+                                                ideal_company_col, source_company_col)
+                        if partial:
+                            st.dataframe(pd.DataFrame(partial))
+                        if st.button("Cancel", key=f"cancel_{source_file.name}"):
+                            job.cancel()
+                    elif job.status == "stopped":
+                        # Time budget reached: show what was found and offer to keep going
+                        if match_key not in match_cache:
+                            match_cache[match_key] = match_records(job.results(), ideal_df, source_df,
+                                                                   ideal_company_col, source_company_col)
+                        st.warning(f"Time budget reached: {job.unscored:,} of {job.total:,} contacts in "
+                                   f"{source_file.name} are not fully scored yet. Results so far are shown below.")
+                        if st.button("Continue refining", key=f"refine_{source_file.name}"):
+                            match_cache.pop(match_key, None)
+                            job.resume()
+                            jobs_running = True
+                    else:
+                        del match_jobs[match_key]
+                        if job.status == "done":
+                            matches = match_records(job.results(), ideal_df, source_df, ideal_company_col, source_company_col)
+                            match_cache[match_key] = matches
+                            for line in job.stats.summary():
+                                st.caption(f"Pruned before scoring - {line}")
+                        elif job.status == "cancelled":
+                            st.warning(f"Matching {source_file.name} was cancelled after {job.done:,} of {job.total:,} contacts.")
+                        else:
+                            st.error(f"Matching {source_file.name} failed: {job.error}")
+                        # The results are copied into match_cache; delete the job's spill files now
+                        job.release()
+                
+                # Results from a finished job, "Match all sources" or an earlier rerun
+                matches = match_cache.get(match_key)
+                if matches is not None:
+                    all_matches[source_file.name] = matches
+                    st.session_state["source_scores"][source_file.name] = np.array(
+                        [match["score"] for match in matches], dtype=np.int16)
                     
                     # Display results
                     st.write(f"Found {len(matches)} matching companies")
@@ -299,11 +478,20 @@ if ideal_file is not None and len(source_files) > 0:
                             get_download_link(matches_df, f"matches_{source_file.name.split('.')[0]}.csv", "Download Matches CSV"),
                             unsafe_allow_html=True
                         )
+                        st.markdown(
+                            get_parquet_download_link(matches_df, f"matches_{source_file.name.split('.')[0]}.parquet", "Download Matches Parquet"),
+                            unsafe_allow_html=True
+                        )
                         
-                        # Visualize match scores
-                        fig = px.histogram(matches_df, x="score", nbins=10, title="Match Score Distribution")
+                        # Visualize match scores from pre-binned counts
+                        import plotly.express as px
+                        fig = px.bar(score_histogram(matches_df["score"], company_threshold), x="bin", y="count",
+                                     title="Match Score Distribution", labels={"bin": "score"})
                         st.plotly_chart(fig)
                         
+                        st.write("Scores by Ideal Company")
+                        st.dataframe(score_summary(matches_df, "ideal_company").head(50))
+                        
                         # Display detailed matches
                         st.subheader("Detailed Matches")
                         
@@ -323,6 +511,32 @@ if ideal_file is not None and len(source_files) > 0:
                                 with col2:
                                     st.write("Source Contact")
                                     st.json(source_contact.to_dict())
+        
+        # Compare the sources matched so far using only their binned counts
+        source_scores = {name: scores for name, scores in st.session_state["source_scores"].items()
+                         if len(scores) and name in {f.name for f in source_files}}
+        if len(source_scores) > 1:
+            st.subheader("Score Summary by Source")
+            summary = pd.DataFrame([
+                {"source": name, "matches": len(scores), "mean": round(float(scores.mean()), 1),
+                 "median": float(np.median(scores)), "min": int(scores.min()), "max": int(scores.max())}
+                for name, scores in source_scores.items()
+            ])
+            st.dataframe(summary)
+            
+            import plotly.express as px
+            histograms = pd.concat(
+                [score_histogram(scores, company_threshold).assign(source=name) for name, scores in source_scores.items()],
+                ignore_index=True
+            )
+            fig = px.bar(histograms, x="bin", y="count", color="source", barmode="group",
+                         title="Match Score Distribution by Source", labels={"bin": "score"})
+            st.plotly_chart(fig)
+        
+        # Poll running jobs; results and progress survive the rerun
+        if jobs_running:
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
 else:
     # Display sample data section
     st.subheader("Sample Data")
@@ -0,0 +1,77 @@
+"""Fail when importing the CLI gets slow or loads the heavy libraries up front.
+
+    python check_import_time.py [--budget-ms 100] [--module leadmatcher5000]
+
+Runs `python -X importtime -c "import <module>"` a few times and takes the
+fastest run, so one slow disk read does not fail the check. Exits with 1 when
+the module's cumulative import time is over budget or any module in
+HEAVY_MODULES was imported eagerly instead of through lazy_imports.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+DEFAULT_MODULE = "leadmatcher5000"
+DEFAULT_BUDGET_MS = 100
+DEFAULT_RUNS = 3
+
+# Modules that must only load on first use; the fuzzywuzzy package itself is an
+# empty __init__ that find_spec imports to locate fuzzywuzzy.fuzz, so it is allowed
+HEAVY_MODULES = ['pandas', 'numpy', 'fuzzywuzzy.fuzz', 'fuzzywuzzy.process', 'Levenshtein',
+                 'plotly', 'tqdm', 'pyarrow']
+
+# "import time:       876 |      10325 | leadmatcher5000"
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def import_times(module: str) -> Tuple[int, Dict[str, int]]:
+    """(cumulative microseconds for module, cumulative microseconds per module it imported)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr}")
+
+    imported: Dict[str, int] = {}
+    total = None
+    for line in result.stderr.splitlines():
+        found = IMPORT_LINE.match(line)
+        if not found:
+            continue
+        name = found.group(4)
+        imported[name] = int(found.group(2))
+        if name == module and not found.group(3):
+            total = int(found.group(2))
+    if total is None:
+        raise SystemExit(f"No import time reported for {module}")
+    return total, imported
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default=DEFAULT_MODULE)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args(argv)
+
+    runs = [import_times(args.module) for _ in range(max(1, args.runs))]
+    total, imported = min(runs, key=lambda run: run[0])
+    eager = [name for name in HEAVY_MODULES if name in imported]
+
+    print(f"import {args.module}: {total / 1000:.1f} ms (budget {args.budget_ms:.0f} ms, best of {len(runs)})")
+    failed = False
+    if total / 1000 > args.budget_ms:
+        print(f"FAIL: over the import budget by {total / 1000 - args.budget_ms:.1f} ms")
+        failed = True
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)} (load them with lazy_imports.lazy_module)")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+# {"companies": {canonical name: [aliases]}, "abbreviations": {word: expansion}}, loaded by leadmatcher5000 and the app
+ALIASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "company_aliases.json")
+
+# Legal-form and filler words dropped from company names
+COMPANY_SUFFIXES = [
+    'inc', 'corp', 'corporation', 'llc', 'ltd', 'limited', 'co',
+    'company', 'group', 'holdings', 'international', 'intl',
+    'worldwide', 'global', 'solutions', 'services', 'technologies',
+    'technology', 'tech', 'plc', 'lp', 'llp', 'gmbh', 'sa', 'ag',
+    'nv', 'bv', 'pty', 'proprietary'
+]
+
+# Legal forms allowed after a known alias ("IBM Corp"); descriptive words such as
+# "technologies" or "group" are not, as "Meta Solutions" need not be Meta Platforms
+LEGAL_FORMS = [
+    'inc', 'incorporated', 'corp', 'corporation', 'llc', 'ltd', 'limited', 'co',
+    'company', 'plc', 'lp', 'llp', 'gmbh', 'sa', 'ag', 'nv', 'bv', 'pty', 'proprietary'
+]
+
+# Trie key marking the end of an alias; tokens are never empty
+_END = ''
+
+
+def alias_key(name) -> str:
+    """Lowercase, punctuation-free form used to look up aliases ("I.B.M. Corp." -> "ibm corp")"""
+    name = str(name).lower().replace('.', '')
+    name = re.sub(r'[^\w\s&]', ' ', name)
+    name = re.sub(r'\s*&\s*', ' & ', name)
+    name = re.sub(r'^\s*the\s+', '', name)
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+class AliasDictionary:
+    """Known company aliases compiled into a hash map and a token trie.
+
+    resolve() maps a name to a canonical company ID in time linear in the
+    name: an exact alias hits the hash map, and a name that starts with an
+    alias followed only by ignorable words (legal forms such as inc or llc)
+    is found by walking the trie.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Iterable[str]]] = None, ignorable_words: Iterable[str] = (),
+                 abbreviations: Optional[Dict[str, str]] = None):
+        self.names: List[str] = []
+        self.canonical_ids: Dict[str, int] = {}
+        self.ids: Dict[str, int] = {}
+        self.trie: Dict = {}
+        self.ignorable = frozenset(ignorable_words)
+        # Word-level expansions applied to names that are not known aliases
+        self.abbreviations: Dict[str, str] = dict(abbreviations or {})
+        for canonical, aliases in (entries or {}).items():
+            self.add(canonical, aliases)
+
+    @classmethod
+    def load(cls, path: str = ALIASES_FILE, ignorable_words: Iterable[str] = LEGAL_FORMS) -> 'AliasDictionary':
+        """Read aliases and abbreviations from a JSON file; a missing file gives neither"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        return cls(data.get('companies'), ignorable_words, data.get('abbreviations'))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, canonical: str, aliases: Iterable[str] = ()):
+        """Register a canonical name; the name itself is always one of its aliases"""
+        key = alias_key(canonical)
+        if not key:
+            return
+        if key not in self.canonical_ids:
+            self.canonical_ids[key] = len(self.names)
+            self.names.append(key)
+        company_id = self.canonical_ids[key]
+
+        for alias in [canonical, *aliases]:
+            alias = alias_key(alias)
+            if not alias:
+                continue
+            self.ids[alias] = company_id
+            node = self.trie
+            for token in alias.split():
+                node = node.setdefault(token, {})
+            node[_END] = company_id
+
+    def resolve(self, name) -> Optional[int]:
+        """Canonical company ID for a name, or None when it is not a known alias"""
+        key = alias_key(name)
+        company_id = self.ids.get(key)
+        if company_id is not None:
+            return company_id
+
+        # Longest alias the name starts with
+        tokens = key.split()
+        node = self.trie
+        end = 0
+        for position, token in enumerate(tokens):
+            node = node.get(token)
+            if node is None:
+                break
+            if _END in node:
+                company_id = node[_END]
+                end = position + 1
+        if company_id is not None and all(token in self.ignorable for token in tokens[end:]):
+            return company_id
+        return None
+
+    def canonical_name(self, company_id: int) -> str:
+        return self.names[company_id]
+
+    def canonical_id(self, name: str) -> Optional[int]:
+        """ID of a canonical name as returned by canonical_name(), None for other names"""
+        return self.canonical_ids.get(name)
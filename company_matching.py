@@ -0,0 +1,796 @@
+"""Company matching for the Streamlit app.
+
+Matches run as MatchJobs on background threads (start_job / get_job), so
+the page script only polls them.
+"""
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+from heapq import heappush, heapreplace
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import scoring
+from company_aliases import AliasDictionary
+from email_domains import registrable_domain
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+
+# Company columns recognised in uploaded files, in order of preference
+COMPANY_COLUMNS = ["Company", "Company Name"]
+
+# Email columns recognised in uploaded files, in order of preference
+EMAIL_COLUMNS = ["Email Address", "Email"]
+
+# Source rows a background job matches between progress updates and cancel checks
+PROGRESS_ROWS = 500
+
+# Candidates kept per distinct source name for one-to-one assignment
+TOP_K_CANDIDATES = 5
+
+# Memory a match may use unless told otherwise; a quarter each goes to chunks in flight,
+# the name memo, the match table and the candidate table. The uploaded frames, the
+# source name lists and the ideal index are not counted.
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+# Rough resident bytes per source row while its chunk is matched (name and email slices, match)
+ROW_BYTES = 200
+
+# Rough bytes per memoized name (normalized name, its best candidate)
+MEMO_ENTRY_BYTES = 250
+
+# Rough bytes per top-k candidate before it moves into a table
+CANDIDATE_BYTES = 120
+
+# Smallest chunk, however tight the budget
+MIN_CHUNK_ROWS = 100
+
+# Rough bytes per candidate while one-to-one assignment sorts a group of them (row, sort index, key)
+ASSIGN_ROW_BYTES = 32
+
+# Rows read at a time from a spilled table
+SLICE_ROWS = 1 << 18
+
+# Scores run from 0 to 100
+MAX_SCORE = 100
+
+# Source rows matched for a quick estimate
+ESTIMATE_SAMPLE_ROWS = 300
+
+# Distinct company names whose alias lookups are remembered
+ALIAS_CACHE_SIZE = 100_000
+
+# Finished jobs kept for their results
+MAX_FINISHED_JOBS = 20
+
+# (source row, ideal row, score)
+Match = Tuple[int, int, int]
+
+# Normalized source name -> its (ideal row, score) candidates, best first
+Candidates = Dict[str, List[Tuple[int, int]]]
+
+
+def normalize_company_name(name):
+    if not isinstance(name, str):
+        return ""
+
+    # Convert to lowercase
+    name = name.lower()
+
+    # Remove common suffixes
+    suffixes = [" inc", " inc.", " incorporated", " llc", " ltd", " limited", " corp", " corp.", " corporation"]
+    for suffix in suffixes:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+
+    # Remove punctuation and extra whitespace
+    name = re.sub(r'[^\w\s]', '', name)
+    name = re.sub(r'\s+', ' ', name).strip()
+
+    return name
+
+
+def chunk_rows(budget_bytes: int, top_k: int = 1) -> int:
+    """Source rows per chunk so the chunk in flight stays within a quarter of the budget"""
+    per_row = ROW_BYTES + top_k * CANDIDATE_BYTES
+    return max(MIN_CHUNK_ROWS, budget_bytes // 4 // per_row)
+
+
+def memo_entries(budget_bytes: int) -> int:
+    """Normalized names the name memo keeps within a quarter of the budget"""
+    return max(MIN_CHUNK_ROWS, budget_bytes // 4 // MEMO_ENTRY_BYTES)
+
+
+def _remember(memo: Dict, key, value, limit: Optional[int]):
+    # Drop the oldest entry once the memo is full; a dropped name is just scored again
+    if limit is not None and len(memo) >= limit:
+        del memo[next(iter(memo))]
+    memo[key] = value
+
+
+def _remove_files(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class SpillTable:
+    """Append-only table of int32 rows that moves to memory-mapped temp files past a budget.
+
+    Rows stay in memory until they exceed budget_bytes; the in-memory blocks
+    are then written out together as one read-only memmap, so the resident
+    part of the table never grows past the budget. close() removes the temp
+    files; otherwise they go when the table is garbage collected.
+    """
+
+    def __init__(self, columns: int, budget_bytes: int):
+        self.columns = columns
+        self.budget_bytes = budget_bytes
+        self._blocks: List = []
+        self._memory_bytes = 0
+        self._spilled: List = []
+        self._paths: List[str] = []
+        self._length = 0
+        self._lock = threading.Lock()
+        weakref.finalize(self, _remove_files, self._paths)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def spilled_rows(self) -> int:
+        return sum(len(block) for block in self._spilled)
+
+    def append(self, rows: Sequence[Sequence[int]]):
+        if not len(rows):
+            return
+        block = np.asarray(rows, dtype=np.int32).reshape(-1, self.columns)
+        with self._lock:
+            self._blocks.append(block)
+            self._memory_bytes += block.nbytes
+            self._length += len(block)
+            if self._memory_bytes > self.budget_bytes:
+                self._spill()
+
+    def _spill(self):
+        data = np.concatenate(self._blocks)
+        fd, path = tempfile.mkstemp(prefix="leadmatcher-", suffix=".i32")
+        os.close(fd)
+        self._paths.append(path)
+        spilled = np.memmap(path, dtype=np.int32, mode="w+", shape=data.shape)
+        spilled[:] = data
+        spilled.flush()
+        self._spilled.append(np.memmap(path, dtype=np.int32, mode="r", shape=data.shape))
+        self._blocks = []
+        self._memory_bytes = 0
+
+    def blocks(self) -> List:
+        """The rows as blocks, in order; spilled blocks stay memory-mapped"""
+        with self._lock:
+            return self._spilled + self._blocks
+
+    def slices(self, rows: int = SLICE_ROWS):
+        """Yield the rows in order, at most `rows` at a time, reading spilled blocks piece by piece"""
+        for block in self.blocks():
+            for start in range(0, len(block), rows):
+                yield np.asarray(block[start:start + rows])
+
+    def array(self):
+        """Every row, in order"""
+        blocks = self.blocks()
+        if not blocks:
+            return np.empty((0, self.columns), dtype=np.int32)
+        return np.concatenate(blocks)
+
+    def close(self):
+        """Drop every row and delete the temp files now"""
+        with self._lock:
+            self._blocks = []
+            self._spilled = []
+            self._memory_bytes = 0
+            self._length = 0
+            _remove_files(self._paths)
+            # The finalizer holds this list, so empty it in place
+            del self._paths[:]
+
+    def tail(self, count: int):
+        """The last count rows, without reading the rest"""
+        with self._lock:
+            blocks = self._spilled + self._blocks
+        kept = []
+        for block in reversed(blocks):
+            if count <= 0:
+                break
+            kept.append(block[-count:])
+            count -= len(kept[-1])
+        if not kept:
+            return np.empty((0, self.columns), dtype=np.int32)
+        return np.concatenate(kept[::-1])
+
+
+_company_aliases: Optional[AliasDictionary] = None
+
+
+def company_aliases() -> AliasDictionary:
+    """The bundled alias dictionary, loaded on first use"""
+    global _company_aliases
+    if _company_aliases is None:
+        _company_aliases = AliasDictionary.load()
+    return _company_aliases
+
+
+@lru_cache(maxsize=ALIAS_CACHE_SIZE)
+def resolve_alias(name: str) -> Optional[int]:
+    """Canonical company ID of a raw name; contact lists repeat their companies, so lookups are cached"""
+    return company_aliases().resolve(name)
+
+
+def find_company_column(df) -> Optional[str]:
+    return next((col for col in df.columns if col in COMPANY_COLUMNS), None)
+
+
+def company_names(df, column: str) -> List:
+    """Raw company values of a column as plain Python objects (missing values stay non-strings)"""
+    return df[column].astype(object).tolist()
+
+
+def contact_emails(df) -> Optional[List]:
+    """Raw email values of the first email column, None when the file has none"""
+    column = next((col for col in df.columns if col in EMAIL_COLUMNS), None)
+    return company_names(df, column) if column else None
+
+
+class IdealIndex:
+    """Normalized, tokenized ideal company names, built once and shared by every source.
+
+    Each distinct normalized name is kept once with its first ideal row; ties
+    in best_match keep the earliest choice, so results match scoring every row.
+    Exact joins run ahead of fuzzy scoring: with emails, employer email
+    domains (free-mail skipped) map to the company most of their ideal
+    addresses work at. With aliases, names known to the alias dictionary
+    also map to the first ideal company with the same canonical name; it is
+    off by default, so plain runs only join on email domains.
+    """
+
+    def __init__(self, names: Sequence, emails: Optional[Sequence] = None, aliases: bool = False):
+        first_rows: Dict[str, int] = {}
+        normalized = [normalize_company_name(name) for name in names]
+        for row, name in enumerate(normalized):
+            first_rows.setdefault(name, row)
+        self.names = list(first_rows)
+        self.rows = list(first_rows.values())
+        self.prepared = [scoring.prepare(name) for name in self.names]
+        self.size = len(names)
+
+        # Token-sorted name -> first ideal row, for names that would score 100 anyway
+        self.exact: Dict[str, int] = {}
+        for prepared, row in zip(self.prepared, self.rows):
+            if prepared.sorted_tokens:
+                self.exact.setdefault(prepared.sorted_tokens, row)
+
+        self.alias_rows: Dict[int, int] = {}
+        for row, name in enumerate(names if aliases else []):
+            company_id = resolve_alias(name) if isinstance(name, str) else None
+            if company_id is not None:
+                self.alias_rows.setdefault(company_id, row)
+
+        companies: Dict[str, Counter] = {}
+        for name, email in zip(normalized, emails if emails is not None else []):
+            domain = registrable_domain(email)
+            if domain and name:
+                companies.setdefault(domain, Counter())[name] += 1
+        # Ties go to the company seen first
+        self.domains = {domain: first_rows[counts.most_common(1)[0][0]] for domain, counts in companies.items()}
+
+    def joined_row(self, name, email=None) -> Optional[int]:
+        """Ideal row an exact join gives a source contact: same email domain, then same canonical alias"""
+        if email is not None and self.domains:
+            ideal_row = self.domains.get(registrable_domain(email))
+            if ideal_row is not None:
+                return ideal_row
+        if self.alias_rows and isinstance(name, str):
+            return self.alias_rows.get(resolve_alias(name))
+        return None
+
+    def exact_row(self, normalized: str) -> Optional[int]:
+        """Ideal row of the first name equal to this one up to word order, without fuzzy scoring"""
+        return self.exact.get(scoring.prepare(normalized).sorted_tokens)
+
+    def candidates(self, normalized: str, threshold: int, k: int = 1,
+                   stats: Optional[scoring.PruneStats] = None) -> List[Tuple[int, int]]:
+        """Up to k (ideal row, score) pairs at or above threshold, best first.
+
+        A min-heap holds the k best so far; once it is full the cutoff rises to
+        beat its weakest entry, so the rest are pruned harder. Ties keep the
+        earlier ideal row, which makes k=1 the same as best_match.
+        """
+        query = scoring.prepare(normalized)
+        heap: List[Tuple[int, int]] = []  # (score, -position)
+        cutoff = threshold
+        for position, choice in enumerate(self.prepared):
+            score = scoring.pruned_score(query, choice, cutoff, (scoring.TOKEN_SORT,), stats, "company")
+            if score < cutoff or score <= 0:
+                continue
+            if len(heap) < k:
+                heappush(heap, (score, -position))
+            else:
+                heapreplace(heap, (score, -position))
+            if len(heap) == k:
+                if heap[0][0] == 100:
+                    break
+                cutoff = max(threshold, heap[0][0] + 1)
+        return [(self.rows[-position], score) for score, position in sorted(heap, reverse=True)]
+
+    def match(self, source_names: Sequence, threshold: int, stats: Optional[scoring.PruneStats] = None,
+              start: int = 0, best: Optional[Candidates] = None,
+              source_emails: Optional[Sequence] = None, top_k: int = 1,
+              candidates: Optional[List[Match]] = None, assigned: Optional[Candidates] = None,
+              memo_limit: Optional[int] = None,
+              progress: Optional[Callable[[int], bool]] = None,
+              joined: Optional[Candidates] = None) -> List[Match]:
+        """Best ideal row for each source name at or above threshold.
+
+        Row numbers are offset by start. best caches candidates per normalized
+        name and can be shared between calls for chunks of the same source;
+        with memo_limit it keeps at most that many names, oldest dropped first.
+        progress(rows done) is called every PROGRESS_ROWS rows, and matching
+        stops early, returning what it has, when it returns False.
+        With a candidates list, each newly scored name appends its top_k
+        candidates as (source row, ideal row, score) and best keeps only the
+        top one. With assigned, names take their assigned candidate, if any,
+        without scoring. Contacts with an exact join (joined_row) match at 100
+        without scoring the name, and with joined their ideal rows are
+        recorded under the normalized name.
+        """
+        matches = []
+        # Contact lists repeat their companies; score each normalized name once
+        best = {} if best is None else best
+        for offset, name in enumerate(source_names):
+            if progress is not None and offset and offset % PROGRESS_ROWS == 0 and not progress(offset):
+                break
+            ideal_row = self.joined_row(name, source_emails[offset] if source_emails is not None else None)
+            if ideal_row is not None:
+                matches.append((start + offset, ideal_row, 100))
+                if joined is not None:
+                    joined.setdefault(normalize_company_name(name), []).append((ideal_row, 100))
+                continue
+            normalized = normalize_company_name(name)
+            if not normalized:
+                continue
+            if assigned is not None:
+                pairs = assigned.get(normalized, [])
+            else:
+                if normalized not in best:
+                    pairs = self.candidates(normalized, threshold, top_k, stats)
+                    if candidates is not None:
+                        candidates.extend((start + offset, row, score) for row, score in pairs)
+                        pairs = pairs[:1]
+                    _remember(best, normalized, pairs, memo_limit)
+                pairs = best[normalized]
+            if pairs:
+                ideal_row, score = pairs[0]
+                matches.append((start + offset, ideal_row, score))
+        return matches
+
+
+def _score_groups(counts, limit: int) -> List[Tuple[int, int]]:
+    """(low, high) score ranges, best first, each holding at most limit rows where one score allows"""
+    groups = []
+    high = MAX_SCORE
+    while high >= 0:
+        low = high
+        rows = counts[high]
+        while low > 0 and rows + counts[low - 1] <= limit:
+            low -= 1
+            rows += counts[low]
+        if rows:
+            groups.append((low, high))
+        high = low - 1
+    return groups
+
+
+def assign_one_to_one(pairs, source_names: Sequence, budget_bytes: Optional[int] = None,
+                      joined: Optional[Candidates] = None) -> Candidates:
+    """Greedy one-to-one assignment over the sparse top-k candidate matrix.
+
+    pairs holds (source row, ideal row, score) rows, the source row being
+    where the name first appeared, rather than a dense names x ideal matrix.
+    Pairs are taken best score first, ties by source row then ideal row,
+    skipping any whose source name or ideal row is already taken. Rows
+    sharing a normalized name share its assignment. Ideal rows in joined
+    (claimed by exact joins) are taken up front, except for the names that
+    joined them.
+
+    pairs may be a SpillTable. With budget_bytes, the pairs are read a slice
+    at a time and sorted in groups of adjacent scores that fit the budget,
+    best group first, so a spilled table is never loaded whole.
+    """
+    table = pairs if isinstance(pairs, SpillTable) else None
+    if table is None:
+        pairs = np.asarray(pairs, dtype=np.int32).reshape(-1, 3)
+
+    def slices():
+        return table.slices() if table is not None else [pairs]
+
+    counts = np.zeros(MAX_SCORE + 1, dtype=np.int64)
+    for part in slices():
+        counts += np.bincount(part[:, 2], minlength=MAX_SCORE + 1)
+    limit = budget_bytes // ASSIGN_ROW_BYTES if budget_bytes else int(counts.sum())
+
+    assigned: Candidates = {}
+    names: Dict[int, str] = {}
+    claimed = {name: {ideal_row for ideal_row, _ in rows} for name, rows in (joined or {}).items()}
+    taken = set().union(*claimed.values())
+    for low, high in _score_groups(counts, max(1, limit)):
+        group = np.concatenate([part[(part[:, 2] >= low) & (part[:, 2] <= high)] for part in slices()])
+        order = np.lexsort((group[:, 1], group[:, 0], -group[:, 2]))
+        for start in range(0, len(order), SLICE_ROWS):
+            for row, ideal_row, score in group[order[start:start + SLICE_ROWS]].tolist():
+                if row not in names:
+                    names[row] = normalize_company_name(source_names[row])
+                name = names[row]
+                if name in assigned or (ideal_row in taken and ideal_row not in claimed.get(name, ())):
+                    continue
+                assigned[name] = [(ideal_row, score)]
+                taken.add(ideal_row)
+    return assigned
+
+
+class MatchEstimate:
+    """Expected matches per threshold and projected run time, extrapolated from a sample"""
+
+    def __init__(self, total: int, sample_size: int, expected: Dict[int, Tuple[float, float]], seconds: float):
+        self.total = total
+        self.sample_size = sample_size
+        # threshold -> (expected matches, 95% margin)
+        self.expected = expected
+        self.seconds = seconds
+
+
+def estimate_matches(index: IdealIndex, source_names: Sequence, thresholds: Sequence[int],
+                     source_emails: Optional[Sequence] = None, sample_rows: int = ESTIMATE_SAMPLE_ROWS,
+                     seed: int = 0) -> MatchEstimate:
+    """Match a stratified random sample of source rows against the full index and extrapolate.
+
+    Rows are stratified by the first character of their normalized company
+    name (blank names form their own stratum) and sampled in proportion.
+    Each sampled row is scored once at the lowest threshold; its best score
+    decides every higher threshold. Run time is projected from the time per
+    sampled row plus the time per distinct name, since a full run scores
+    each distinct name once.
+    """
+    total = len(source_names)
+    if not total:
+        return MatchEstimate(0, 0, {threshold: (0.0, 0.0) for threshold in thresholds}, 0.0)
+
+    strata: Dict[str, List[int]] = {}
+    for row, name in enumerate(source_names):
+        strata.setdefault(normalize_company_name(name)[:1], []).append(row)
+    rng = np.random.default_rng(seed)
+    sample_rows = min(sample_rows, total)
+    sample = []
+    weights = []
+    for rows in strata.values():
+        take = min(len(rows), max(1, round(sample_rows * len(rows) / total)))
+        sample.extend(rng.choice(rows, take, replace=False).tolist())
+        weights.extend([len(rows) / take] * take)
+
+    low = min(thresholds)
+    scored_names = set()
+    best_scores = []
+    started = time.perf_counter()
+    scoring_seconds = 0.0
+    for row in sample:
+        name = source_names[row]
+        if index.joined_row(name, source_emails[row] if source_emails is not None else None) is not None:
+            best_scores.append(100)
+            continue
+        normalized = normalize_company_name(name)
+        if not normalized:
+            best_scores.append(0)
+            continue
+        scoring_started = time.perf_counter()
+        pairs = index.candidates(normalized, low)
+        scoring_seconds += time.perf_counter() - scoring_started
+        scored_names.add(normalized)
+        best_scores.append(pairs[0][1] if pairs else 0)
+    row_seconds = (time.perf_counter() - started - scoring_seconds) / len(sample)
+
+    best_scores = np.asarray(best_scores)
+    weights = np.asarray(weights)
+    expected = {}
+    for threshold in thresholds:
+        hits = best_scores >= threshold
+        share = float(np.average(hits, weights=weights))
+        # 95% normal interval with the finite population correction (no margin when every row is sampled)
+        correction = (total - len(sample)) / (total - 1) if total > 1 else 0.0
+        margin = 1.96 * np.sqrt(share * (1 - share) / len(sample) * correction) * total
+        expected[threshold] = (share * total, float(margin))
+
+    # Distinct raw names bound the distinct normalized names a full run scores
+    name_seconds = scoring_seconds / len(scored_names) if scored_names else 0.0
+    distinct = len(set(name for name in source_names if isinstance(name, str)))
+    return MatchEstimate(total, len(sample), expected, row_seconds * total + name_seconds * distinct)
+
+
+class MatchJob:
+    """Match one source on a background thread with progress, partial results and cancel.
+
+    The page script only polls the job, so reruns and widget changes
+    neither block on it nor restart it. With one_to_one, partial results are
+    each row's best candidate and the final results are assigned one-to-one.
+    Chunk sizes, the name memo and the in-memory share of the match and
+    candidate tables follow memory_budget_mb. release() deletes the job's
+    spill files once its results have been read; finished jobs beyond
+    MAX_FINISHED_JOBS are released when new jobs start.
+
+    With deadline_seconds the job runs in anytime mode: exact joins and
+    names identical to an ideal name are matched first, then the remaining
+    names are fuzzy scored most common first until the deadline, leaving
+    the job "stopped" with `unscored` rows; resume() continues from there.
+    One-to-one assignment needs every candidate, so it ignores the deadline.
+    """
+
+    def __init__(self, index: IdealIndex, source_names: Sequence, threshold: int,
+                 source_emails: Optional[Sequence] = None, one_to_one: bool = False,
+                 memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB, deadline_seconds: Optional[float] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.index = index
+        self.source_names = source_names
+        self.source_emails = source_emails
+        self.threshold = threshold
+        self.one_to_one = one_to_one
+        self.top_k = TOP_K_CANDIDATES if one_to_one else 1
+        budget = memory_budget_mb * 2**20
+        self.chunk_size = chunk_rows(budget, self.top_k)
+        self.memo_limit = memo_entries(budget)
+        self.table_budget = budget // 4
+        self.deadline_seconds = None if one_to_one else deadline_seconds
+        self.stats = scoring.PruneStats()
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.done = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done_at_start = 0
+        self._found = SpillTable(3, self.table_budget)
+        # Anytime mode: next row of the exact pass, with its name memo, name code per row and names
+        self._exact_next = 0
+        self._exact: Dict[str, Optional[int]] = {}
+        self._codes = None
+        self._names: Dict[str, int] = {}
+        # then (distinct names, rows grouped by name, where each name's rows start, names by priority)
+        self._refine: Optional[Tuple] = None
+        self._refined = 0
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"match-job-{self.id}", daemon=True)
+
+    @property
+    def total(self) -> int:
+        return len(self.source_names)
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def unscored(self) -> int:
+        """Rows not matched or fuzzy scored yet"""
+        return self.total - self.done
+
+    @property
+    def pairs_scored(self) -> int:
+        return sum(pairs - pruned for pairs, pruned in list(self.stats.stages.values()))
+
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+    def eta(self) -> Optional[float]:
+        """Seconds left at the rate so far, None until there is a rate"""
+        done = self.done - self._done_at_start
+        if done <= 0 or self.started_at is None:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed / done * (self.total - self.done)
+
+    @property
+    def found_count(self) -> int:
+        return len(self._found)
+
+    def results(self, last: Optional[int] = None) -> List[Match]:
+        """Matches found so far in source order (all of them once the job is done), or the last few found"""
+        if last is None:
+            rows = self._found.array()
+            rows = rows[np.argsort(rows[:, 0], kind="stable")]
+        else:
+            rows = self._found.tail(last)
+        return [tuple(row) for row in rows.tolist()]
+
+    def start(self) -> 'MatchJob':
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def release(self):
+        """Drop the results and delete their spill files; call once they have been read"""
+        self._found.close()
+
+    def wait(self, timeout: Optional[float] = None) -> 'MatchJob':
+        self._thread.join(timeout)
+        return self
+
+    def resume(self, deadline_seconds: Optional[float] = None) -> 'MatchJob':
+        """Keep refining a job stopped at its deadline, for another deadline_seconds"""
+        if self.status != "stopped":
+            return self
+        self.deadline_seconds = deadline_seconds or self.deadline_seconds
+        self.status = "queued"
+        self._thread = threading.Thread(target=self._run, name=f"match-job-{self.id}", daemon=True)
+        return self.start()
+
+    def _run(self):
+        self.status = "running"
+        self.started_at = time.monotonic()
+        self._done_at_start = self.done
+        try:
+            if self.deadline_seconds:
+                self._run_anytime(self.started_at + self.deadline_seconds)
+            else:
+                self._run_chunks()
+        except Exception as e:
+            self.error = str(e)
+            self.status = "failed"
+        finally:
+            self.finished_at = time.monotonic()
+
+    def _progress(self, start: int) -> Callable[[int], bool]:
+        """IdealIndex.match progress callback for the chunk at start; False once cancelled"""
+        def progress(done: int) -> bool:
+            self.done = start + done
+            return not self._cancelled.is_set()
+        return progress
+
+    def _run_chunks(self):
+        best = {}
+        candidates = SpillTable(3, self.table_budget) if self.one_to_one else None
+        # Ideal rows claimed by exact joins, which one-to-one assignment must not hand out again
+        joined = {} if self.one_to_one else None
+        try:
+            for start in range(0, self.total, self.chunk_size):
+                chunk, emails = self._chunk(start)
+                new_candidates = [] if candidates is not None else None
+                self._found.append(self.index.match(chunk, self.threshold, self.stats, start, best, emails,
+                                                    self.top_k, new_candidates, memo_limit=self.memo_limit,
+                                                    progress=self._progress(start), joined=joined))
+                if self._cancelled.is_set():
+                    self.status = "cancelled"
+                    return
+                if candidates is not None:
+                    candidates.append(new_candidates)
+                self.done = start + len(chunk)
+            if candidates is not None:
+                best = {}
+                assigned = assign_one_to_one(candidates, self.source_names, self.table_budget, joined)
+                candidates.close()
+                found = SpillTable(3, self.table_budget)
+                for start in range(0, self.total, self.chunk_size):
+                    chunk, emails = self._chunk(start)
+                    found.append(self.index.match(chunk, self.threshold, start=start, source_emails=emails,
+                                                  assigned=assigned))
+                self._found.close()
+                self._found = found
+            self.status = "done"
+        finally:
+            if candidates is not None:
+                candidates.close()
+
+    def _run_anytime(self, deadline: float):
+        if self._refine is None and not self._match_exact(deadline):
+            return
+        names, by_name, name_starts, priority = self._refine
+        while self._refined < len(priority):
+            if self._cancelled.is_set():
+                self.status = "cancelled"
+                return
+            if time.monotonic() >= deadline:
+                self.status = "stopped"
+                return
+            code = priority[self._refined]
+            rows = by_name[name_starts[code]:name_starts[code + 1]]
+            pairs = self.index.candidates(names[code], self.threshold, 1, self.stats)
+            if pairs:
+                ideal_row, score = pairs[0]
+                self._found.append([(row, ideal_row, score) for row in rows.tolist()])
+            self._refined += 1
+            self.done += len(rows)
+        self.status = "done"
+
+    def _match_exact(self, deadline: float) -> bool:
+        """Anytime first pass: match exact joins and exact names, group the rest by name.
+
+        Returns False if cancelled or stopped at the deadline; the pass picks
+        up where it left off on resume.
+        """
+        exact = self._exact
+        names = self._names
+        if self._codes is None:
+            self._codes = np.full(self.total, -1, dtype=np.int32)
+        codes = self._codes
+        for start in range(self._exact_next, self.total, self.chunk_size):
+            if self._cancelled.is_set():
+                self.status = "cancelled"
+                return False
+            if time.monotonic() >= deadline:
+                self.status = "stopped"
+                return False
+            chunk, emails = self._chunk(start)
+            found = []
+            pending = 0
+            for offset, name in enumerate(chunk):
+                ideal_row = self.index.joined_row(name, emails[offset] if emails is not None else None)
+                if ideal_row is None:
+                    normalized = normalize_company_name(name)
+                    if not normalized:
+                        continue
+                    if normalized not in exact:
+                        _remember(exact, normalized, self.index.exact_row(normalized), self.memo_limit)
+                    ideal_row = exact[normalized]
+                    if ideal_row is None:
+                        codes[start + offset] = names.setdefault(normalized, len(names))
+                        pending += 1
+                        continue
+                found.append((start + offset, ideal_row, 100))
+            self._found.append(found)
+            self.done += len(chunk) - pending
+            self._exact_next = start + len(chunk)
+
+        # Rows grouped by name; the names covering most rows are scored first
+        unresolved = np.flatnonzero(codes >= 0)
+        by_name = unresolved[np.argsort(codes[unresolved], kind="stable")]
+        counts = np.bincount(codes[unresolved], minlength=len(names))
+        name_starts = np.concatenate(([0], np.cumsum(counts)))
+        self._refine = (list(names), by_name, name_starts, np.argsort(-counts, kind="stable").tolist())
+        self._exact = {}
+        self._codes = None
+        self._names = {}
+        return True
+
+    def _chunk(self, start: int):
+        end = start + self.chunk_size
+        emails = self.source_emails[start:end] if self.source_emails is not None else None
+        return self.source_names[start:end], emails
+
+
+# Jobs outlive the script run that started them, so they live at module level
+_jobs: Dict[str, MatchJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def start_job(index: IdealIndex, source_names: Sequence, threshold: int,
+              source_emails: Optional[Sequence] = None, one_to_one: bool = False,
+              memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB, deadline_seconds: Optional[float] = None) -> MatchJob:
+    job = MatchJob(index, source_names, threshold, source_emails, one_to_one, memory_budget_mb, deadline_seconds)
+    with _jobs_lock:
+        # Forget the oldest finished jobs
+        finished = sorted((j for j in _jobs.values() if not j.running), key=lambda j: j.finished_at or 0)
+        for old in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            old.release()
+            del _jobs[old.id]
+        _jobs[job.id] = job
+    return job.start()
+
+
+def get_job(job_id: Optional[str]) -> Optional[MatchJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id) if job_id else None
+
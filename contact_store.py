@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+MISSING = -1
+
+# Column-oriented formats read straight into Arrow-backed frames
+COLUMNAR_EXTENSIONS = ('.parquet', '.feather')
+
+# Columns whose distinct values are at most this share of rows become categoricals
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+
+class ContactRecord:
+    """Read-only view of one contact row, only built when writing output."""
+    __slots__ = ('store', 'row', 'field_mapping', 'has_person_match', 'company_score')
+
+    # Match attributes readable like fields
+    ATTRIBUTES = ('has_person_match', 'company_score')
+
+    def __init__(self, store: 'ContactStore', row: int, field_mapping: Dict[str, str],
+                 has_person_match: bool = False, company_score: Optional[int] = None):
+        self.store = store
+        self.row = row
+        # Output field name -> store field name
+        self.field_mapping = field_mapping
+        self.has_person_match = has_person_match
+        self.company_score = company_score
+
+    def get(self, name, default=None):
+        if name in self.ATTRIBUTES:
+            return getattr(self, name)
+        field = self.field_mapping.get(name)
+        if field is None:
+            return default
+        return self.store.value(field, self.row)
+
+    def __getitem__(self, name):
+        value = self.get(name, KeyError)
+        if value is KeyError:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return name in self.ATTRIBUTES or name in self.field_mapping
+
+    def keys(self):
+        return list(self.field_mapping) + list(self.ATTRIBUTES)
+
+    def to_dict(self) -> Dict:
+        return {name: self.get(name) for name in self.keys()}
+
+    def __repr__(self):
+        return f"ContactRecord({self.to_dict()!r})"
+
+
+class ContactStore:
+    """Columnar contact table: per field an int32 code array into unique values.
+
+    Rows are identified by their integer position. Missing values have code -1
+    and read back as ''.
+    """
+
+    def __init__(self, codes: Dict[str, np.ndarray], categories: Dict[str, np.ndarray], size: int):
+        self.codes = codes
+        self.categories = categories
+        self.size = size
+        # Integer fields computed per unique value by derive_number, e.g. role codes
+        self.numbers: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, fields: Optional[Iterable[str]] = None,
+                   extra: Optional[Dict[str, pd.Series]] = None) -> 'ContactStore':
+        """Build a store from the given DataFrame columns plus any derived series"""
+        columns = {}
+        for field in (df.columns if fields is None else fields):
+            if field in df.columns:
+                columns[field] = df[field]
+        columns.update(extra or {})
+
+        codes = {}
+        categories = {}
+        for field, series in columns.items():
+            field_codes, uniques = factorize_strings(series)
+            codes[field] = field_codes
+            categories[field] = uniques
+        return cls(codes, categories, len(df))
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, field):
+        return field in self.codes
+
+    def value(self, field: str, row: int) -> str:
+        """Stripped string value of a field, '' when missing"""
+        codes = self.codes.get(field)
+        if codes is None:
+            return ''
+        code = codes[row]
+        return '' if code == MISSING else self.categories[field][code]
+
+    def unique_values(self, field: str) -> np.ndarray:
+        return self.categories.get(field, np.array([], dtype=object))
+
+    def derive(self, field: str, func: Callable[[str], str], name: str) -> np.ndarray:
+        """Add field `name` holding func(value), computed once per unique value"""
+        codes = self.codes.get(field)
+        if codes is None:
+            codes = np.full(self.size, MISSING, dtype=np.int32)
+            uniques = []
+        else:
+            uniques = self.categories[field]
+        mapped = pd.Index([func(value) for value in uniques], dtype=object)
+        mapped_codes, mapped_uniques = pd.factorize(mapped.where(mapped != '', None), use_na_sentinel=True)
+        remap = np.append(mapped_codes, MISSING).astype(np.int32)
+        self.codes[name] = remap[codes]
+        self.categories[name] = np.asarray(mapped_uniques, dtype=object)
+        return self.codes[name]
+
+    def derive_number(self, field: str, func: Callable[[str], int], name: str, missing: int = 0) -> np.ndarray:
+        """Add integer field `name` holding func(value), computed once per unique value;
+        rows where the field is missing get `missing`"""
+        codes = self.codes.get(field)
+        if codes is None:
+            self.numbers[name] = np.full(self.size, missing, dtype=np.int32)
+        else:
+            mapped = [func(value) for value in self.categories[field]]
+            self.numbers[name] = np.asarray(mapped + [missing], dtype=np.int32)[codes]
+        return self.numbers[name]
+
+    def record(self, row: int, field_mapping: Dict[str, str], **kwargs) -> ContactRecord:
+        """Build an output view for a row; fields absent from the store are left out"""
+        present = {name: field for name, field in field_mapping.items() if field in self.codes}
+        return ContactRecord(self, row, present, **kwargs)
+
+
+def factorize_strings(series: pd.Series):
+    """Integer codes and stripped unique values for a string column"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # Strip once per unique value; this can merge values or leave them empty
+    stripped = pd.Index([str(value).strip() for value in np.asarray(uniques, dtype=object)], dtype=object)
+    stripped_codes, stripped_uniques = pd.factorize(stripped.where(stripped != '', None), use_na_sentinel=True)
+    remap = np.append(stripped_codes, MISSING).astype(np.int32)
+    return remap[codes], np.asarray(stripped_uniques, dtype=object)
+
+
+def is_columnar_file(name: str) -> bool:
+    """True for Parquet and Feather file names"""
+    return str(name).lower().endswith(COLUMNAR_EXTENSIONS)
+
+
+def read_columnar(source, name: str) -> pd.DataFrame:
+    """Read a Parquet or Feather file (path or buffer) into Arrow-backed columns without copying"""
+    if str(name).lower().endswith('.feather'):
+        df = pd.read_feather(source, dtype_backend='pyarrow')
+    else:
+        df = pd.read_parquet(source, dtype_backend='pyarrow')
+
+    # Match the CSV loaders: clean up column names and drop unnamed columns
+    df.columns = [str(col).strip() for col in df.columns]
+    return df.loc[:, ~df.columns.str.contains('^Unnamed')]
+
+
+def compact_frame(df: pd.DataFrame, max_unique_ratio: float = CATEGORICAL_MAX_UNIQUE_RATIO) -> pd.DataFrame:
+    """Convert repetitive string columns (company, title, function...) to categoricals"""
+    if df.empty:
+        return df
+    for col in df.columns:
+        series = df[col]
+        if series.dtype != object:
+            continue
+        if series.nunique(dropna=True) <= max_unique_ratio * len(series):
+            df[col] = series.astype('category')
+    return df
+
+
+def coalesce_columns(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """First non-missing value across the given columns, row by row"""
+    result = pd.Series([None] * len(df), index=df.index, dtype=object)
+    for col in columns:
+        if col in df.columns:
+            result = result.where(result.notna(), df[col].astype(object))
+    return result
+
+
+def group_rows(codes: np.ndarray) -> Dict[int, np.ndarray]:
+    """Row IDs for each code, in row order, skipping missing values"""
+    if not len(codes):
+        return {}
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    ends = np.r_[starts[1:], len(sorted_codes)]
+    return {int(sorted_codes[start]): order[start:end]
+            for start, end in zip(starts, ends) if sorted_codes[start] != MISSING}
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+import scoring
+from contact_store import MISSING, ContactStore, group_rows
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+# Golden record fields, filled from the most common non-empty value in each cluster
+GOLDEN_FIELDS = ['First Name', 'Last Name', 'Email Address', 'Company', 'Position', 'URL', 'Connected On']
+
+
+class UnionFind:
+    """Disjoint sets over row IDs 0..n-1 with union by size and path halving"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> bool:
+        """Merge the sets of a and b; False if they were already together"""
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return True
+
+    def union_all(self, items: Iterable[int]) -> int:
+        """Merge every item into one set; returns the number of merges"""
+        items = iter(items)
+        first = next(items, None)
+        return sum(self.union(first, item) for item in items)
+
+    def labels(self) -> np.ndarray:
+        """Cluster number per item, numbered in order of first appearance"""
+        roots = [self.find(item) for item in range(len(self.parent))]
+        return pd.factorize(np.asarray(roots, dtype=np.int64))[0].astype(np.int32)
+
+
+def _block_key(person_norm: str) -> str:
+    # People in the same company whose last names start alike are compared
+    tokens = person_norm.split()
+    return tokens[-1][:2] if tokens else ''
+
+
+def cluster_contacts(store: ContactStore, name_threshold: int,
+                     stats: Optional[scoring.PruneStats] = None) -> np.ndarray:
+    """Cluster number per contact row.
+
+    Rows are linked by exact edges (same email, same LinkedIn URL, same
+    name at the same company) and by fuzzy edges (names scoring at least
+    name_threshold within the same company and last-name block).
+    """
+    sets = UnionFind(len(store))
+
+    # Exact keys: every row sharing a value joins one set
+    for field in ('email_norm', 'url_norm'):
+        if field in store:
+            for rows in group_rows(store.codes[field]).values():
+                sets.union_all(rows.tolist())
+
+    if 'person_norm' not in store or 'company_norm' not in store:
+        return sets.labels()
+
+    person_codes = store.codes['person_norm']
+    person_names = store.unique_values('person_norm')
+    for rows in group_rows(store.codes['company_norm']).values():
+        # Same name at the same company
+        names = {}
+        for row in rows.tolist():
+            code = person_codes[row]
+            if code != MISSING:
+                names.setdefault(code, []).append(row)
+        for name_rows in names.values():
+            sets.union_all(name_rows)
+
+        # Similar names at the same company, compared once per distinct name
+        blocks: Dict[str, List[int]] = {}
+        for code in names:
+            blocks.setdefault(_block_key(person_names[code]), []).append(code)
+        for codes in blocks.values():
+            for i, code_a in enumerate(codes):
+                prepared_a = scoring.prepare(person_names[code_a])
+                for code_b in codes[i + 1:]:
+                    score = scoring.pruned_score(prepared_a, person_names[code_b], name_threshold,
+                                                 (scoring.TOKEN_SORT,), stats, 'person dedup')
+                    if score >= name_threshold:
+                        sets.union(names[code_a][0], names[code_b][0])
+
+    return sets.labels()
+
+
+def golden_records(contacts: pd.DataFrame, labels: np.ndarray) -> pd.DataFrame:
+    """One row per cluster with the most common value of each field and its provenance
+    (Sources as file#row, Source Count, In Target).
+
+    contacts needs GOLDEN_FIELDS plus 'source', 'source_row' and 'is_target' columns.
+    """
+    contacts = contacts.assign(cluster=labels)
+    golden = pd.DataFrame(index=pd.RangeIndex(int(labels.max()) + 1 if len(labels) else 0, name='cluster'))
+
+    for field in GOLDEN_FIELDS:
+        values = contacts[field].astype(object).fillna('').astype(str).str.strip()
+        present = contacts.assign(value=values)[values != '']
+        counts = present.groupby(['cluster', 'value'], sort=False).size()
+        # Most common value per cluster; ties go to the value seen first
+        best = counts.groupby(level='cluster').idxmax()
+        golden[field] = pd.Series([value for _, value in best], index=best.index).reindex(golden.index, fill_value='')
+
+    provenance = contacts['source'].astype(str) + '#' + (contacts['source_row'] + 1).astype(str)
+    grouped = contacts.assign(provenance=provenance).groupby('cluster')
+    golden['Sources'] = grouped['provenance'].agg('; '.join)
+    golden['Source Count'] = grouped['source'].nunique()
+    golden['In Target'] = grouped['is_target'].any()
+    return golden.reset_index(drop=True)
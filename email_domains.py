@@ -0,0 +1,39 @@
+import os
+from typing import FrozenSet, Optional
+
+# Bundled list of free-mail providers, one domain per line
+FREE_EMAIL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "free_email_domains.txt")
+
+# Second-level labels under country codes that are not registrable by themselves (example.co.uk)
+SECOND_LEVEL_LABELS = {'ac', 'co', 'com', 'edu', 'gov', 'net', 'org', 'ltd', 'plc'}
+
+_free_domains: Optional[FrozenSet[str]] = None
+
+
+def free_email_domains() -> FrozenSet[str]:
+    """Free-mail domains from FREE_EMAIL_FILE, read on first use"""
+    global _free_domains
+    if _free_domains is None:
+        try:
+            with open(FREE_EMAIL_FILE, encoding='utf-8') as f:
+                lines = (line.strip().lower() for line in f)
+                _free_domains = frozenset(line for line in lines if line and not line.startswith('#'))
+        except FileNotFoundError:
+            _free_domains = frozenset()
+    return _free_domains
+
+
+def registrable_domain(email) -> str:
+    """Employer domain of an email address ("Jo@mail.Acme.co.uk" -> "acme.co.uk").
+
+    Empty for missing or malformed addresses and for free-mail providers.
+    """
+    if not isinstance(email, str) or email.count('@') != 1:
+        return ''
+    labels = [label for label in email.split('@')[1].strip().lower().rstrip('.').split('.') if label]
+    if len(labels) < 2:
+        return ''
+    # Keep one label left of the public suffix
+    keep = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS else 2
+    domain = '.'.join(labels[-keep:])
+    return '' if domain in free_email_domains() else domain
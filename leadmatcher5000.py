@@ -1,14 +1,70 @@
-import pandas as pd
+from __future__ import annotations
+
 import re
 import json
 import os
-from fuzzywuzzy import process, fuzz
-from typing import Dict, List, Optional, Tuple
-from tqdm import tqdm
+from typing import Dict, List, Optional
 import csv
 
+# pandas, numpy and fuzzywuzzy load on first use so the menu shows straight away
+from lazy_imports import lazy_module
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+fuzz = lazy_module('fuzzywuzzy.fuzz')
+
+import dedup
+import reports
+from company_aliases import ALIASES_FILE, COMPANY_SUFFIXES, LEGAL_FORMS, AliasDictionary
+from match_store import MATCH_STORE_FILE, MatchStore
+from role_taxonomy import UNMAPPED, function_code, has_function, role_code, roles_agree
+from run_state import RunState
+import scoring
+from contact_store import (ContactStore, COLUMNAR_EXTENSIONS, coalesce_columns, compact_frame, group_rows,
+                           is_columnar_file, read_columnar)
+
 SETTINGS_FILE = "matcher_settings.json"
 
+# Contact file types offered in the file menus
+CONTACT_EXTENSIONS = ('.csv',) + COLUMNAR_EXTENSIONS
+
+# Report formats offered in the Output Formats menu
+OUTPUT_FORMATS = reports.OUTPUT_FORMATS
+
+# Company columns checked in order; the first non-empty one wins per row
+COMPANY_COLUMNS = ['Company', 'Company Name', 'Company Division Name']
+
+# Memory a match run may use unless the settings say otherwise (memory_budget_mb, as in the app);
+# a quarter goes to the pair score cache of person matching
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+# Department columns checked in order, as for COMPANY_COLUMNS
+DEPARTMENT_COLUMNS = ['Department', 'Job Function']
+
+# Golden contacts written by Deduplicate Sources; usable as an input file
+GOLDEN_FILE = "golden_contacts.csv"
+
+# Golden record field -> columns it is read from, covering source and target layouts
+DEDUP_COLUMNS = {
+    'First Name': ['First Name'],
+    'Last Name': ['Last Name'],
+    'Email Address': ['Email Address'],
+    'Company': COMPANY_COLUMNS,
+    'Position': ['Position', 'Job Title'],
+    'URL': ['URL', 'LinkedIn Contact Profile URL', 'LinkedIn'],
+    'Connected On': ['Connected On']
+}
+
+# Report field name -> source column it is read from
+REPORT_FIELDS = {
+    'First Name': 'First Name',
+    'Last Name': 'Last Name',
+    'Email Address': 'Email Address',
+    'Job Title': 'Position',
+    'Company': 'Company',
+    'LinkedIn': 'URL',
+    'Connected On': 'Connected On'
+}
+
 def try_read_csv(file_path):
     """Try to read a CSV file with different encodings and delimiters"""
     encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252', 'macroman']
@@ -23,15 +79,26 @@ def try_read_csv(file_path):
                 df.columns = [col.strip() for col in df.columns]
                 
                 # Drop unnamed columns
-                df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+                df = df.loc[:, ~df.columns.str.contains('^Unnamed')].copy()
                 
-                return df
+                # Store repetitive columns as categoricals
+                return compact_frame(df)
             except Exception as e:
                 continue
     
     print(f"ERROR: Failed to read {file_path} with all encodings and delimiters")
     return None
 
+def read_contacts(file_path):
+    """Read a contact file: Parquet/Feather directly, anything else as CSV"""
+    if is_columnar_file(file_path):
+        try:
+            return read_columnar(file_path, file_path)
+        except Exception as e:
+            print(f"ERROR: Failed to read {file_path}: {e}")
+            return None
+    return try_read_csv(file_path)
+
 def print_box(title: str, content: List[str], width: int = 60):
     """Print content in a nice box."""
     # Clean and pad content lines
@@ -67,6 +134,15 @@ def load_settings(filename: str = SETTINGS_FILE) -> Optional[Dict]:
     except FileNotFoundError:
         return None
 
+def target_files(settings) -> List[str]:
+    """Target files to match against; older settings only have target_file"""
+    return settings.get('target_files') or ([settings['target_file']] if settings.get('target_file') else [])
+
+def set_target_files(settings, files: List[str]):
+    settings['target_files'] = files
+    # The first target stays the target for deduplication, the watch folder and the service
+    settings['target_file'] = files[0]
+
 def display_current_settings(settings):
     """Display current settings in a formatted box"""
     print("\n╔" + "═" * 52 + "╗")
@@ -75,7 +151,12 @@ def display_current_settings(settings):
     
     # Files
     print("║ Input File:", settings.get('input_file', 'Not set').ljust(41) + "║")
-    print("║ Target File:", settings.get('target_file', 'Not set').ljust(40) + "║")
+    targets = target_files(settings)
+    if len(targets) > 1:
+        print("║ Target Files:", ", ".join(targets).ljust(39) + "║")
+    else:
+        print("║ Target File:", settings.get('target_file', 'Not set').ljust(40) + "║")
+    print("║ Output Formats:", ", ".join(settings.get('output_formats', ['txt'])).ljust(37) + "║")
     print("║" + " " * 52 + "║")
     
     # Thresholds
@@ -102,10 +183,10 @@ def display_current_settings(settings):
     print("╚" + "═" * 52 + "╝")
 
 def get_csv_files():
-    """Get list of CSV files in current directory"""
+    """Get list of contact files (CSV, Parquet, Feather) in current directory"""
     files = []
     for file in os.listdir('.'):
-        if file.lower().endswith('.csv'):
+        if file.lower().endswith(CONTACT_EXTENSIONS):
             files.append(file)
     return sorted(files)
 
@@ -113,7 +194,7 @@ def select_file(prompt="Select a file"):
     """Let user select a single file from available CSVs"""
     csv_files = get_csv_files()
     if not csv_files:
-        print("No CSV files found in current directory")
+        print("No CSV, Parquet or Feather files found in current directory")
         return None
     
     print(f"\n{prompt}:")
@@ -134,7 +215,7 @@ def select_multiple_files(prompt="Select files"):
     """Let user select multiple files from available CSVs"""
     csv_files = get_csv_files()
     if not csv_files:
-        print("No CSV files found in current directory")
+        print("No CSV, Parquet or Feather files found in current directory")
         return []
     
     print(f"\n{prompt} (enter multiple numbers separated by spaces):")
@@ -249,6 +330,21 @@ def print_overlap_stats(name, overlaps, target_companies):
     else:
         print(f"First 10 overlapping companies: {sorted(overlaps)[:10]}")
 
+def print_prune_stats(stats: scoring.PruneStats):
+    """Show how many pairs each stage skipped before fuzzy scoring."""
+    lines = stats.summary()
+    if lines:
+        print_box("Pruned Pairs", lines)
+
+_company_aliases: Optional[AliasDictionary] = None
+
+def company_aliases() -> AliasDictionary:
+    """Alias dictionary from ALIASES_FILE, loaded on first use"""
+    global _company_aliases
+    if _company_aliases is None:
+        _company_aliases = AliasDictionary.load(ALIASES_FILE, LEGAL_FORMS)
+    return _company_aliases
+
 def normalize_company_name(name):
     """Normalize company names for better matching"""
     if pd.isna(name):
@@ -264,57 +360,31 @@ def normalize_company_name(name):
     # Remove leading "the"
     name = re.sub(r'^the\s+', '', name)
     
-    # Handle special cases
-    if 'qcr' in name.lower():
-        # Special handling for QCR Holdings variations
-        name = re.sub(r'qcr\s*holdings?\s*(?:inc|incorporated)?', 'qcr holdings', name)
-        return name.strip()
+    # Known aliases resolve straight to their canonical name
+    aliases = company_aliases()
+    company_id = aliases.resolve(name)
+    if company_id is not None:
+        return aliases.canonical_name(company_id)
     
     # Handle educational institutions
     edu_keywords = ['university', 'college', 'institute', 'school']
     is_edu = any(keyword in name for keyword in edu_keywords)
     
-    # Remove common company suffixes and prefixes
-    suffixes = [
-        'inc', 'corp', 'corporation', 'llc', 'ltd', 'limited', 'co',
-        'company', 'group', 'holdings', 'international', 'intl',
-        'worldwide', 'global', 'solutions', 'services', 'technologies',
-        'technology', 'tech', 'plc', 'lp', 'llp', 'gmbh', 'sa', 'ag',
-        'nv', 'bv', 'pty', 'proprietary'
-    ]
-    
     # Handle department/division indicators
     divisions = ['division of', 'subsidiary of', 'part of', 'a division of', 'a subsidiary of']
     for div in divisions:
         name = re.sub(rf'\s*{div}\s+', ' ', name)
     
-    # Standardize common abbreviations
-    abbrev_map = {
-        'corp': 'corporation',
-        'inc': 'incorporated',
-        'intl': 'international',
-        'tech': 'technology',
-        'mfg': 'manufacturing',
-        'svcs': 'services',
-        'sys': 'systems',
-        'grp': 'group',
-        'hldg': 'holding',
-        'univ': 'university',
-        'hosp': 'hospital',
-        'med': 'medical',
-        'ctr': 'center'
-    }
-    
-    # First expand abbreviations
+    # Expand common abbreviations
     words = name.split()
     for i, word in enumerate(words):
-        if word in abbrev_map:
-            words[i] = abbrev_map[word]
+        if word in aliases.abbreviations:
+            words[i] = aliases.abbreviations[word]
     name = ' '.join(words)
     
     # Only remove suffixes if not an educational institution
     if not is_edu:
-        for suffix in sorted(suffixes, key=len, reverse=True):
+        for suffix in sorted(COMPANY_SUFFIXES, key=len, reverse=True):
             pattern = rf'\s+{suffix}(?:\s+|$)'
             name = re.sub(pattern, ' ', name)
     
@@ -442,161 +512,6 @@ def get_person_key(row, column_mapping=None):
         'email_name': email_name
     }
 
-def find_person_matches(input_contacts, target_contacts, thresholds):
-    """Find matches between people using multiple criteria"""
-    matches = []
-    
-    for input_contact in tqdm(input_contacts, desc="Processing input contacts"):
-        input_key = get_person_key(input_contact)
-        input_company = normalize_company_name(input_contact.get('company', ''))
-        
-        best_match = None
-        best_score = 0
-        
-        for target_contact in target_contacts:
-            target_key = get_person_key(target_contact)
-            target_company = normalize_company_name(target_contact.get('company', ''))
-            
-            # Skip if normalized companies don't match with fuzzy matching
-            if not input_company or not target_company:
-                continue
-                
-            company_score = max(
-                fuzz.token_sort_ratio(input_company, target_company),
-                fuzz.token_set_ratio(input_company, target_company),
-                fuzz.partial_ratio(input_company, target_company)
-            )
-            
-            if company_score < thresholds['company_name']:
-                continue
-                
-            # Compare names using multiple methods
-            name_score = max(
-                fuzz.token_sort_ratio(input_key, target_key),
-                fuzz.token_set_ratio(input_key, target_key),
-                fuzz.partial_ratio(input_key, target_key)  
-            )
-            
-            # Check nicknames if score is below threshold
-            if name_score < thresholds['person_name']:
-                input_first = input_contact.get('first_name', '').lower()
-                target_first = target_contact.get('first_name', '').lower()
-                
-                # Check if either name has nicknames
-                input_nicknames = ['will', 'bill', 'billy'] if input_first == 'william' else [input_first]
-                target_nicknames = ['rob', 'bob', 'bobby'] if target_first == 'robert' else [target_first]
-                
-                # Compare all nickname combinations
-                for i_nick in input_nicknames:
-                    for t_nick in target_nicknames:
-                        nick_key = f"{i_nick} {input_contact.get('last_name', '')}"
-                        target_nick_key = f"{t_nick} {target_contact.get('last_name', '')}"
-                        nick_score = max(
-                            fuzz.token_sort_ratio(nick_key, target_nick_key),
-                            fuzz.token_set_ratio(nick_key, target_nick_key),
-                            fuzz.partial_ratio(nick_key, target_nick_key)  
-                        )
-                        name_score = max(name_score, nick_score)
-            
-            # Check email if available
-            email_score = 0
-            input_email = input_contact.get('email', '')
-            target_email = target_contact.get('email', '')
-            if input_email and target_email:
-                email_score = fuzz.ratio(input_email.lower(), target_email.lower())
-                
-                # If emails match exactly, boost the overall score
-                if email_score == 100:
-                    name_score = max(name_score, thresholds['person_name'] + 10)
-            
-            # Update best match if this is better
-            if name_score >= thresholds['person_name'] and name_score > best_score:
-                best_score = name_score
-                best_match = {
-                    'input_contact': input_contact,
-                    'target_contact': target_contact,
-                    'score': name_score
-                }
-        
-        if best_match:
-            matches.append(best_match)
-    
-    print(f"\nFound {len(matches)} person matches.")
-    return matches
-
-def find_matches(source_df: pd.DataFrame, target_df: pd.DataFrame, thresholds: Dict[str, int]) -> List[Tuple[str, str, float]]:
-    """Find matches between two dataframes using fuzzy string matching."""
-    matches = []
-    seen_matches = set()
-    
-    # Print column names for debugging
-    print("\nSource columns:", source_df.columns.tolist())
-    print("Target columns:", target_df.columns.tolist())
-    
-    # Detect company column names
-    source_company_col = None
-    target_company_col = None
-    
-    # Try common company column names
-    company_cols = ['Company', 'Company Name', 'Organization', 'Employer', 'Business']
-    for col in company_cols:
-        if col in source_df.columns:
-            source_company_col = col
-        if col in target_df.columns:
-            target_company_col = col
-    
-    if not source_company_col or not target_company_col:
-        print("Error: Could not find company columns. Available columns:")
-        print("Source:", source_df.columns.tolist())
-        print("Target:", target_df.columns.tolist())
-        return matches
-    
-    print(f"\nUsing columns: {source_company_col} (source) and {target_company_col} (target)")
-    
-    # Get unique company names from both dataframes
-    source_companies = source_df[source_company_col].dropna().unique()
-    target_companies = target_df[target_company_col].dropna().unique()
-    
-    print(f"\nFound {len(source_companies)} source companies and {len(target_companies)} target companies")
-    
-    print("\nProcessing company matches...")
-    
-    # Use tqdm for progress tracking
-    with tqdm(total=len(source_companies), ncols=80, 
-              bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt}') as pbar:
-        for source_company in source_companies:
-            # Normalize source company name
-            norm_source = normalize_company_name(source_company)
-            if not norm_source:
-                pbar.update(1)
-                continue
-            
-            # Find best match in target companies
-            best_match = process.extractOne(
-                norm_source,
-                [normalize_company_name(tc) for tc in target_companies],
-                scorer=fuzz.token_sort_ratio
-            )
-            
-            if best_match and best_match[1] >= thresholds['company_name']:
-                match_idx = best_match[2]
-                target_company = target_companies[match_idx]
-                
-                # Create a unique key for this match
-                match_key = f"{norm_source}|||{normalize_company_name(target_company)}"
-                
-                if match_key not in seen_matches:
-                    matches.append((source_company, target_company, best_match[1]))
-                    seen_matches.add(match_key)
-                    
-                    # Print match details on a new line
-                    print(f"\nMatch found: '{source_company}' -> '{target_company}' (score: {best_match[1]})")
-                    print(f"Normalized: '{norm_source}' -> '{normalize_company_name(target_company)}'")
-            
-            pbar.update(1)
-    
-    return matches
-
 def detect_company_column(columns):
     """Detect which column contains company names."""
     company_keywords = ['company', 'organization', 'employer', 'business', 'firm']
@@ -615,80 +530,129 @@ def detect_company_column(columns):
 
 def write_contact_info(f, contact_data, prefix=""):
     """Helper function to write contact information consistently"""
-    # Write name
-    name = f"{contact_data.get('First Name', '')} {contact_data.get('Last Name', '')}".strip()
-    f.write(f"{prefix}Name: {name}\n")
-    
-    # Write title if available
-    title = contact_data.get('Job Title', '').strip()
-    f.write(f"{prefix}Title: {title if title else 'Not Available'}\n")
-    
-    # Write email if available
-    email = contact_data.get('Email Address', '').strip()
-    f.write(f"{prefix}Email: {email if email else 'Not Available'}\n")
-    
-    # Write LinkedIn URL if available
-    linkedin = contact_data.get('LinkedIn', '').strip()
-    f.write(f"{prefix}LinkedIn: {linkedin if linkedin else 'Not Available'}\n")
-    
-    # Write company if available
-    company = contact_data.get('Company', '').strip()
-    f.write(f"{prefix}Company: {company if company else 'Not Available'}\n")
-    
-    # Write connected on date if available
-    connected_on = contact_data.get('Connected On', '').strip()
-    if connected_on:
-        f.write(f"{prefix}Connected On: {connected_on}\n")
-    
-    f.write(f"{prefix}" + "-" * 50 + "\n")
-
-def write_overlap_report(company_matches, input_file, target_file):
-    """Write a focused overlap report for outreach purposes"""
-    output_file = 'company_overlaps.txt'
-    print(f"Writing results to {output_file}...")
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # Write header
-        f.write("Contact Matching Results\n")
-        f.write("=" * 50 + "\n\n")
-        f.write("These are the contacts that the Source person knows at the Target list of companies and people.\n\n")
-        f.write(f"Source File: {input_file}\n")
-        f.write(f"Target File: {target_file}\n\n")
-        
-        # Write statistics
-        f.write("Summary\n")
-        f.write("-" * 30 + "\n")
-        f.write(f"Total contacts matched: {sum(len(m[2]) for m in company_matches)}\n")
-        f.write(f"Companies with matches: {len(company_matches)}\n")
-        f.write(f"Source: {input_file}\n")
-        f.write(f"Target companies: {target_file}\n\n")
-        
-        # Write detailed matches
-        f.write("Contacts by Target Company\n")
-        f.write("=" * 50 + "\n\n")
-        
-        for match in company_matches:
-            if match[2]:  # If there are contacts for this company
-                f.write(f"\nCompany: {match[1]}\n")
-                f.write(f"Number of contacts: {len(match[2])}\n")
-                f.write("-" * 50 + "\n\n")
-                
-                for person in match[2]:
-                    if isinstance(person, dict) and 'score' in person:
-                        # This is a matched contact
-                        f.write(f"Match Score: {person['score']:.1f}%\n")
-                        f.write("\nYour Connection:\n")
-                        write_contact_info(f, person['input_contact'], "  ")
-                        f.write("\nProspect:\n")
-                        write_contact_info(f, person['target_contact'], "  ")
-                    else:
-                        # This is an unmatched contact
-                        write_contact_info(f, person, "  ")
-                    f.write("-" * 50 + "\n\n")
-
-    print(f"Matching complete! Results written to {output_file}")
-    print(f"Total contacts matched: {sum(len(m[2]) for m in company_matches)}")
-    print(f"Companies with matches: {len(company_matches)}")
+    f.write(reports.format_contact(contact_data, prefix))
+
+def write_overlap_report(company_matches, input_file, target_file, formats=None, output_base='company_overlaps'):
+    """Write a focused overlap report for outreach purposes.
+
+    company_matches may be a generator; each company is written as soon as it is produced.
+    """
+    return reports.write_report(company_matches, input_file, target_file, formats, output_base)
+
+def select_output_formats(settings):
+    """Let user pick which report formats are written after a run"""
+    current = settings.get('output_formats', ['txt'])
+    print("\nAvailable output formats:")
+    for i, fmt in enumerate(OUTPUT_FORMATS, 1):
+        marker = "x" if fmt in current else " "
+        print(f"{i}. [{marker}] company_overlaps.{fmt}")
+    
+    while True:
+        try:
+            choices = input("\nEnter format numbers separated by spaces: ").strip().split()
+            selections = list(dict.fromkeys(OUTPUT_FORMATS[int(choice) - 1] for choice in choices if int(choice) >= 1))
+            if selections:
+                settings['output_formats'] = selections
+                return settings
+            print("Select at least one format")
+        except (ValueError, IndexError):
+            print("Please enter valid numbers")
+
+def query_match_store(settings):
+    """Ask who we know at a company, answered from stored runs"""
+    path = settings.get('match_store', MATCH_STORE_FILE)
+    if not os.path.exists(path):
+        print(f"\nNo match store found at {path}. Run the program first.")
+        input("Press Enter to continue...")
+        return
+    
+    company = input("\nCompany name: ").strip()
+    try:
+        min_score = int(input("Minimum match score (0-100, Enter for 0): ").strip() or 0)
+    except ValueError:
+        min_score = 0
+    
+    norm = normalize_company_name(company)
+    with MatchStore(path) as store:
+        # Exact normalized name first, then any company containing it
+        results = store.who_we_know(norm, min_score) or store.who_we_know(norm, min_score, partial=True)
+    
+    lines = [
+        f"{row['first_name']} {row['last_name']} - {row['title'] or 'No title'} "
+        f"({row['score']}%, {row['company']}, {row['source_file']})"
+        for row in results
+    ]
+    print_box(f"Who We Know at {company}", lines or ["No matches found"], width=80)
+    input("Press Enter to continue...")
+
+def normalize_url(url):
+    """Compare LinkedIn URLs without scheme, www, query or trailing slash"""
+    url = url.strip().lower().split('?')[0].rstrip('/')
+    return re.sub(r'^(https?://)?(www\.)?', '', url)
+
+def canonical_contacts(df: pd.DataFrame, source_name: str, is_target: bool = False) -> pd.DataFrame:
+    """Contacts in golden record columns, tagged with where each row came from"""
+    frame = pd.DataFrame({field: coalesce_columns(df, columns) for field, columns in DEDUP_COLUMNS.items()})
+    frame['source'] = source_name
+    frame['source_row'] = np.arange(len(df))
+    frame['is_target'] = is_target
+    return frame.reset_index(drop=True)
+
+def deduplicate_contacts(input_files: List[str], target_file: Optional[str], thresholds: Dict[str, int]) -> Optional[pd.DataFrame]:
+    """Resolve the same person across all input files (and the target) into golden records"""
+    frames = []
+    for file_path in input_files:
+        df = read_contacts(file_path)
+        if df is None:
+            print(f"Skipping {file_path}: could not read it")
+            continue
+        frames.append(canonical_contacts(df, file_path))
+    if target_file:
+        target_df = read_contacts(target_file)
+        if target_df is not None:
+            frames.append(canonical_contacts(target_df, target_file, is_target=True))
+    if not frames:
+        return None
+    
+    contacts = pd.concat(frames, ignore_index=True)
+    store = build_contact_store(contacts)
+    store.derive('URL', normalize_url, 'url_norm')
+    
+    stats = scoring.PruneStats()
+    labels = dedup.cluster_contacts(store, thresholds['person_name'], stats)
+    golden = dedup.golden_records(contacts, labels)
+    
+    # The target only links people; people found nowhere else are not source contacts
+    target_only = golden['In Target'] & (golden['Source Count'] == 1)
+    golden = golden[~target_only].reset_index(drop=True)
+    print_box("Deduplication", [
+        f"Contacts read: {len(contacts):,} from {len(frames)} file(s)",
+        f"People after deduplication: {len(golden):,}",
+        f"Found in more than one file: {(golden['Source Count'] > 1).sum():,}",
+        f"Also in the target list: {golden['In Target'].sum():,}"
+    ] + stats.summary())
+    return golden
+
+def deduplicate_sources(settings):
+    """Merge several source files into one golden contact file"""
+    files = select_multiple_files("Select source files to deduplicate")
+    if not files:
+        return settings
+    use_target = settings.get('target_file') and \
+        input(f"Link against the target file {settings['target_file']} too? (y/n): ").strip().lower() == 'y'
+    thresholds = settings.get('thresholds', {'person_name': 85})
+    
+    golden = deduplicate_contacts(files, settings['target_file'] if use_target else None, thresholds)
+    if golden is None:
+        print("\nNo contacts could be read.")
+    else:
+        output = settings.get('golden_file', GOLDEN_FILE)
+        golden.to_csv(output, index=False)
+        print(f"\nWrote {len(golden):,} golden records to {output}")
+        if input("Use it as the input file? (y/n): ").strip().lower() == 'y':
+            settings['input_file'] = output
+    input("Press Enter to continue...")
+    return settings
 
 def test_company_match(name1, name2):
     """Test if two company names would match using our normalization and scoring."""
@@ -701,7 +665,7 @@ def test_company_match(name1, name2):
     print(f"Original 2: {name2}")
     print(f"Normalized 2: {norm2}")
     
-    score = fuzz.token_sort_ratio(norm1, norm2)
+    score = scoring.score(norm1, norm2, (scoring.TOKEN_SORT,))
     print(f"Match score: {score}")
     
     if score >= 80:
@@ -711,134 +675,341 @@ def test_company_match(name1, name2):
     
     return score
 
-def find_matches(input_file, target_file, thresholds):
-    """Find matches between input and target contacts using fuzzy string matching"""
+def build_contact_store(df: pd.DataFrame) -> ContactStore:
+    """Load contacts into a columnar store with normalized matching keys"""
+    first = df['First Name'].astype(object).fillna('').astype(str) if 'First Name' in df.columns else ''
+    last = df['Last Name'].astype(object).fillna('').astype(str) if 'Last Name' in df.columns else ''
+    extra = {
+        'company': coalesce_columns(df, COMPANY_COLUMNS),
+        'person_name': pd.Series(first, index=df.index) + ' ' + last
+    }
+    if any(col in df.columns for col in DEPARTMENT_COLUMNS):
+        extra['department'] = coalesce_columns(df, DEPARTMENT_COLUMNS)
+    store = ContactStore.from_frame(df, extra=extra)
+    
+    # Normalize each distinct value once instead of once per row pair
+    store.derive('company', normalize_company_name, 'company_norm')
+    store.derive('person_name', normalize_person_name, 'person_norm')
+    store.derive('Email Address', lambda email: email.lower(), 'email_norm')
+    if 'department' in store:
+        store.derive('department', normalize_job_title, 'department_norm')
+        store.derive_number('department_norm', function_code, 'department_function')
+    return store
+
+def derive_roles(store: ContactStore, title_field: str):
+    """Normalize job titles and map each distinct one to a role code (see role_taxonomy)"""
+    store.derive(title_field, normalize_job_title, 'title_norm')
+    store.derive_number('title_norm', role_code, 'title_role')
+
+def field_score(field, stage, source, source_row, target, target_row, threshold, stats=None, cache=None):
+    """token_sort score of a normalized field between two contacts, memoized per pair of distinct values"""
+    source_value = source.value(field, source_row)
+    target_value = target.value(field, target_row)
+    if cache is None:
+        return scoring.pruned_score(source_value, target_value, threshold, (scoring.TOKEN_SORT,), stats, stage)
+    return cache.score(stage, source.codes[field][source_row], target.codes[field][target_row],
+                       source_value, target_value, threshold, (scoring.TOKEN_SORT,), stats)
+
+def departments_agree(source, source_row, target, target_row, threshold, stats=None, cache=None):
+    """False only when both contacts have a department and the departments differ"""
+    source_department = source.value('department_norm', source_row)
+    target_department = target.value('department_norm', target_row)
+    if not source_department or not target_department:
+        return True
+    
+    source_function = source.numbers['department_function'][source_row]
+    target_function = target.numbers['department_function'][target_row]
+    if source_function != UNMAPPED and target_function != UNMAPPED:
+        return source_function == target_function
+    # Departments outside the taxonomy are fuzzy matched
+    return field_score('department_norm', 'department', source, source_row, target, target_row,
+                       threshold, stats, cache) >= threshold
+
+def is_person_match(source, source_row, target, target_row, thresholds, stats=None, cache=None):
+    """Check whether a source contact is the same person as a target contact.
+    
+    With a scoring.PairCache, fuzzy scores are looked up per pair of distinct values.
+    """
+    # Check name match
+    source_name = source.value('person_norm', source_row)
+    target_name = target.value('person_norm', target_row)
+    if source_name and target_name:
+        name_score = field_score('person_norm', 'person name', source, source_row, target, target_row,
+                                 thresholds['person_name'], stats, cache)
+        if name_score >= thresholds['person_name']:
+            return True
+    
+    # Check email match
+    if 'Email Address' in source and 'Email Address' in target:
+        source_email = source.value('email_norm', source_row)
+        if source_email and source_email == target.value('email_norm', target_row):
+            return True
+    
+    # Check title match
+    if 'Position' in source and 'Job Title' in target:
+        source_title = source.value('title_norm', source_row)
+        target_title = target.value('title_norm', target_row)
+        if source_title and target_title and departments_agree(source, source_row, target, target_row,
+                                                               thresholds['department'], stats, cache):
+            # Titles that both name a function in the role taxonomy agree on seniority and function;
+            # the rest, including seniority-only titles like "president", are fuzzy matched
+            source_role = source.numbers['title_role'][source_row]
+            target_role = target.numbers['title_role'][target_row]
+            if has_function(source_role) and has_function(target_role):
+                if roles_agree(source_role, target_role):
+                    return True
+            elif field_score('title_norm', 'title', source, source_row, target, target_row,
+                             thresholds['title'], stats, cache) >= thresholds['title']:
+                return True
+    
+    return False
+
+def company_display_name(target: ContactStore, target_rows):
+    """Use the longest spelling of the company name among its target rows"""
+    company_name = ''
+    for target_row in target_rows:
+        name = target.value('company', target_row)
+        if len(name) > len(company_name):
+            company_name = name
+    return company_name
+
+class MatchCancelled(Exception):
+    """Raised inside a match whose cancelled event was set, e.g. when a service client disconnects"""
+
+def check_cancelled(cancelled) -> None:
+    """Raise MatchCancelled once a threading.Event passed as cancelled is set"""
+    if cancelled is not None and cancelled.is_set():
+        raise MatchCancelled()
+
+class TargetIndex:
+    """Target contacts prepared once so many source files can be matched against them"""
+    
+    def __init__(self, target: ContactStore):
+        self.store = target
+        derive_roles(target, 'Job Title')
+        
+        self.norms = target.unique_values('company_norm')
+        self.codes = {norm: code for code, norm in enumerate(self.norms)}
+        self.prepared = [scoring.prepare(norm) for norm in self.norms]
+        
+        # Canonical company ID -> target company code, for names resolved by the alias dictionary
+        aliases = company_aliases()
+        self.canonical = {}
+        for code, norm in enumerate(self.norms):
+            company_id = aliases.canonical_id(norm)
+            if company_id is not None:
+                self.canonical[company_id] = code
+        
+        # Name every target company up front so results stream out in report order
+        self.companies = sorted(
+            ((code, rows, company_display_name(target, rows)) for code, rows in group_rows(target.codes['company_norm']).items()),
+            key=lambda company: company[2].lower()
+        )
+    
+    def __len__(self):
+        return len(self.store)
+
+def build_target_index(target_df: pd.DataFrame) -> TargetIndex:
+    """Load target contacts into a reusable matching index"""
+    return TargetIndex(build_contact_store(target_df))
+
+def link_companies_multi(source: ContactStore, targets: List[TargetIndex], threshold, stats,
+                         states: Optional[List[Optional[RunState]]] = None, cancelled=None):
+    """link_companies for several target lists in one pass; returns one link map per target.
+    
+    Target company names are merged across the lists first, so a name that
+    appears in several lists is scored once per source company. A source name
+    the alias dictionary resolves links to the target with the same canonical
+    name at 100; fuzzy scoring is only skipped between two resolved names.
+    Setting the cancelled event raises MatchCancelled at the next source company.
+    """
+    aliases = company_aliases()
+    states = states or [None] * len(targets)
+    known = [state.known_links() if state else {} for state in states]
+    
+    # Merged target name -> the (list, company code) pairs that carry it
+    merged_codes = {}
+    owners = []
+    for i, target in enumerate(targets):
+        for code in range(len(target.norms)):
+            merged = merged_codes.setdefault(target.norms[code], len(owners))
+            if merged == len(owners):
+                owners.append([])
+            owners[merged].append((i, code))
+    merged_prepared = [scoring.prepare(norm) for norm in merged_codes]
+    merged_resolved = [aliases.canonical_id(norm) is not None for norm in merged_codes]
+    
+    # Per list, the merged names added since its last run
+    new_targets = []
+    for target, state in zip(targets, states):
+        previous_targets = state.previous_target_norms() if state else set()
+        new_targets.append({merged_codes[norm] for norm in target.norms if norm not in previous_targets})
+    
+    links = [{} for _ in targets]
+    source_links = [{} for _ in targets]
+    for source_code, source_norm in enumerate(source.unique_values('company_norm')):
+        check_cancelled(cancelled)
+        company_id = aliases.canonical_id(source_norm)
+        matched = [{} for _ in targets]
+        # Merged names each list still needs scored; None means all of them
+        scope = [None] * len(targets)
+        for i, target in enumerate(targets):
+            if source_norm in known[i]:
+                matched[i] = {target.codes[norm]: score for norm, score in known[i][source_norm].items()
+                              if norm in target.codes}
+                scope[i] = new_targets[i]
+            if company_id is not None and company_id in target.canonical:
+                matched[i][target.canonical[company_id]] = 100
+        if any(needed is None for needed in scope):
+            candidates = range(len(owners))
+        else:
+            candidates = sorted(set().union(*scope))
+        if company_id is not None:
+            # Two resolved names are the same company exactly when their canonical IDs are equal
+            candidates = [merged for merged in candidates if not merged_resolved[merged]]
+        
+        # Compare normalized company names once per distinct pair
+        prepared = scoring.prepare(source_norm)
+        for merged in candidates:
+            score = scoring.pruned_score(merged_prepared[merged], prepared, threshold,
+                                         (scoring.TOKEN_SORT,), stats, 'company')
+            if score >= threshold:
+                for i, code in owners[merged]:
+                    if scope[i] is None or merged in scope[i]:
+                        matched[i][code] = score
+        
+        for i, target in enumerate(targets):
+            source_links[i][source_norm] = {target.norms[code]: score for code, score in matched[i].items()}
+            for code, score in matched[i].items():
+                links[i].setdefault(code, []).append((source_code, score))
+    
+    for i, state in enumerate(states):
+        if state:
+            state.record(source.unique_values('company_norm'), source.codes['company_norm'], targets[i].norms,
+                         source_links[i])
+    return links
+
+def link_companies(source: ContactStore, target: TargetIndex, threshold, stats, state: Optional[RunState] = None,
+                   cancelled=None):
+    """Map each target company code to the (source company code, score) pairs that match it.
+    
+    Companies known to the alias dictionary link by canonical ID alone; only
+    the rest are fuzzy scored. With a previous run state, source companies
+    that still have an unchanged row reuse their old decisions and are only
+    scored against new target companies.
+    """
+    return link_companies_multi(source, [target], threshold, stats, [state], cancelled)[0]
+
+def iter_linked_companies(source: ContactStore, target: TargetIndex, links, thresholds, stats=None,
+                          memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, cancelled=None):
+    """Yield (company key, company name, contacts) per linked target company, sorted by name"""
+    from tqdm import tqdm
+    source_groups = group_rows(source.codes['company_norm'])
+    # Titles and names repeat across contacts, so person matching scores each pair of distinct values once
+    cache = scoring.PairCache.for_budget(memory_budget_mb * 2**20 // 4)
+    
+    for target_code, target_rows, company_name in tqdm(target.companies, desc="Processing companies"):
+        target_norm = target.norms[target_code]
+        matched = links.get(target_code, [])
+        if not matched:
+            continue
+        matched_rows = [source_groups[source_code] for source_code, _ in matched]
+        company_scores = dict(matched)
+        
+        # Keep one contact per name/email, in source order, flagged if any target row is the same person
+        contacts = {}
+        for source_row in np.sort(np.concatenate(matched_rows)):
+            check_cancelled(cancelled)
+            person_match = any(is_person_match(source, source_row, target.store, target_row, thresholds, stats, cache)
+                               for target_row in target_rows)
+            record = source.record(source_row, REPORT_FIELDS,
+                                   company_score=company_scores[source.codes['company_norm'][source_row]])
+            key = f"{record.get('First Name', '')}-{record.get('Last Name', '')}-{record.get('Email Address', '')}"
+            record.has_person_match = person_match or (key in contacts and contacts[key].has_person_match)
+            contacts[key] = record
+        
+        yield (target_norm, company_name, list(contacts.values()))
+    
+    lines = cache.summary()
+    if lines:
+        print_box("Pair Score Cache", lines)
+
+def iter_contact_matches(source: ContactStore, target, thresholds, state: Optional[RunState] = None,
+                         memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, cancelled=None):
+    """Yield (company key, company name, contacts) per matching target company, sorted by name.
+    
+    target may be a TargetIndex (reused across calls) or a ContactStore. Once
+    the optional cancelled event is set, MatchCancelled is raised at the next
+    source company or contact.
+    """
+    if not isinstance(target, TargetIndex):
+        target = TargetIndex(target)
+    stats = scoring.PruneStats()
+    derive_roles(source, 'Position')
+    
+    links = link_companies(source, target, thresholds['company_name'], stats, state, cancelled)
+    yield from iter_linked_companies(source, target, links, thresholds, stats, memory_budget_mb, cancelled)
+    
+    print_prune_stats(stats)
+
+def match_contact_stores(source: ContactStore, target, thresholds):
+    """Group source contacts under each matching target company"""
+    return list(iter_contact_matches(source, target, thresholds))
+
+def iter_target_matches(input_file, target_files: List[str], thresholds, incremental=True,
+                        memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """Read the input once and match it against several target files in one pass.
+    
+    Yields (target file, company matches) per target in order; each company
+    matches generator must be used up before the next target's. With
+    incremental=True each target keeps its own run state, saved once its
+    matches are out.
+    """
     print("\nContact Matcher")
     print("=" * 50 + "\n")
 
     # Load files
     print("Reading files...")
-    target_contacts = try_read_csv(target_file)
-    input_contacts = try_read_csv(input_file)
-    if target_contacts is None or input_contacts is None:
+    input_contacts = read_contacts(input_file)
+    target_contacts = [read_contacts(target_file) for target_file in target_files]
+    if input_contacts is None or any(contacts is None for contacts in target_contacts):
         print(f"Error: Could not read input or target files")
-        return []
+        return
 
-    # First find all company matches
+    states = [None] * len(target_files)
+    if incremental:
+        for i, (target_file, contacts) in enumerate(zip(target_files, target_contacts)):
+            states[i] = RunState.load(input_file, target_file, thresholds['company_name'])
+            states[i].begin(input_contacts, contacts)
+            print_box("Incremental Run" if len(target_files) == 1 else f"Incremental Run: {target_file}",
+                      states[i].delta())
+
+    # Normalize the input once and link its companies to every target together
     print("Finding company matches...")
-    company_matches = {}  # Use dict to track unique normalized company names
-    
-    # Process each target company
-    for _, target_row in tqdm(target_contacts.iterrows(), desc="Processing companies"):
-        target_company = None
-        for col in ['Company', 'Company Name', 'Company Division Name']:
-            if col in target_contacts.columns and not pd.isna(target_row[col]):
-                target_company = str(target_row[col])
-                break
-        
-        if not target_company:
-            continue
-            
-        target_norm = normalize_company_name(target_company)
-        if not target_norm:
-            continue
-            
-        # Find all contacts at companies that match this target company
-        contact_dict = {}  # Use dict to track unique contacts
-        for _, source_row in input_contacts.iterrows():
-            source_company = None
-            for col in ['Company', 'Company Name', 'Company Division Name']:
-                if col in input_contacts.columns and not pd.isna(source_row[col]):
-                    source_company = str(source_row[col])
-                    break
-                    
-            if not source_company:
-                continue
-                
-            source_norm = normalize_company_name(source_company)
-            if not source_norm:
-                continue
-                
-            # Compare normalized company names
-            company_score = fuzz.token_sort_ratio(target_norm, source_norm)
-            
-            # If companies match, add all contacts and check for person matches
-            if company_score >= thresholds['company_name']:
-                contact_data = {}
-                # Map source fields to standardized fields
-                field_mapping = {
-                    'First Name': 'First Name',
-                    'Last Name': 'Last Name',
-                    'Email Address': 'Email Address',
-                    'Position': 'Job Title',
-                    'Company': 'Company',
-                    'URL': 'LinkedIn',
-                    'Connected On': 'Connected On'
-                }
-                
-                # Copy all available fields with proper handling of NaN values
-                for source_field, target_field in field_mapping.items():
-                    if source_field in source_row:
-                        value = source_row[source_field]
-                        if pd.isna(value):
-                            contact_data[target_field] = ''
-                        else:
-                            contact_data[target_field] = str(value).strip()
-                
-                # Check for person match
-                person_match = False
-                
-                # Check name match
-                source_name = normalize_person_name(f"{source_row.get('First Name', '')} {source_row.get('Last Name', '')}")
-                target_name = normalize_person_name(f"{target_row.get('First Name', '')} {target_row.get('Last Name', '')}")
-                if source_name and target_name:
-                    name_score = fuzz.token_sort_ratio(source_name, target_name)
-                    if name_score >= thresholds['person_name']:
-                        person_match = True
-                
-                # Check email match
-                if not person_match and 'Email Address' in source_row and 'Email Address' in target_row:
-                    source_email = str(source_row['Email Address']).lower().strip() if not pd.isna(source_row['Email Address']) else ''
-                    target_email = str(target_row['Email Address']).lower().strip() if not pd.isna(target_row['Email Address']) else ''
-                    if source_email and target_email and source_email == target_email:
-                        person_match = True
-                
-                # Check title match
-                if not person_match and 'Position' in source_row and 'Job Title' in target_row:
-                    source_title = normalize_job_title(str(source_row['Position'])) if not pd.isna(source_row['Position']) else ''
-                    target_title = normalize_job_title(str(target_row['Job Title'])) if not pd.isna(target_row['Job Title']) else ''
-                    if source_title and target_title:
-                        title_score = fuzz.token_sort_ratio(source_title, target_title)
-                        if title_score >= thresholds['title']:
-                            person_match = True
-                
-                # Add a flag to indicate if this contact has a personal match
-                contact_data['has_person_match'] = person_match
-                
-                # Create a unique key for this contact
-                contact_key = f"{contact_data.get('First Name', '')}-{contact_data.get('Last Name', '')}-{contact_data.get('Email Address', '')}"
-                contact_dict[contact_key] = contact_data
-        
-        if contact_dict:
-            # Store unique contacts for this normalized company name
-            if target_norm in company_matches:
-                # Get existing contacts and merge with new ones
-                _, best_company_name, existing_contacts = company_matches[target_norm]
-                # Convert existing contacts to dictionary for deduplication
-                existing_dict = {}
-                for contact in existing_contacts:
-                    key = f"{contact.get('First Name', '')}-{contact.get('Last Name', '')}-{contact.get('Email Address', '')}"
-                    existing_dict[key] = contact
-                # Update with new contacts
-                existing_dict.update(contact_dict)
-                # Use the longer/more complete company name
-                final_company_name = target_company if len(target_company) > len(best_company_name) else best_company_name
-                company_matches[target_norm] = (target_norm, final_company_name, list(existing_dict.values()))
-            else:
-                company_matches[target_norm] = (target_norm, target_company, list(contact_dict.values()))
-    
-    # Convert the dictionary values back to a list and sort by company name
-    return sorted(company_matches.values(), key=lambda x: x[1].lower())
+    source = build_contact_store(input_contacts)
+    derive_roles(source, 'Position')
+    targets = [build_target_index(contacts) for contacts in target_contacts]
+    stats = scoring.PruneStats()
+    all_links = link_companies_multi(source, targets, thresholds['company_name'], stats, states)
+    
+    for target_file, target, links, state in zip(target_files, targets, all_links, states):
+        yield target_file, iter_linked_companies(source, target, links, thresholds, stats, memory_budget_mb)
+        if state:
+            state.save()
+    print_prune_stats(stats)
+
+def iter_matches(input_file, target_file, thresholds, incremental=True):
+    """Read both files and yield company matches as they are found.
+    
+    With incremental=True only rows added or changed since the last run of
+    the same files are re-scored; the run state is saved once all matches are out.
+    """
+    for _, company_matches in iter_target_matches(input_file, [target_file], thresholds, incremental):
+        yield from company_matches
+
+def find_matches(input_file, target_file, thresholds, incremental=True):
+    """Find matches between input and target contacts using fuzzy string matching"""
+    return list(iter_matches(input_file, target_file, thresholds, incremental))
 
 def process_company_names(df):
     """Extract and process company names from DataFrame"""
@@ -848,33 +1019,6 @@ def process_company_names(df):
             return df[col].dropna().unique()
     return []
 
-def find_company_matches(normalized_name, input_contacts, thresholds):
-    """Find contacts that match a given company name"""
-    matches = []
-    company_cols = ['Company', 'Company Name', 'Company Division Name']
-    
-    for _, contact in tqdm(input_contacts.iterrows(), desc="Matching contacts", leave=False):
-        # Find company column
-        contact_company = None
-        for col in company_cols:
-            if col in contact and not pd.isna(contact[col]):
-                contact_company = contact[col]
-                break
-                
-        if not contact_company:
-            continue
-            
-        # Compare normalized names
-        contact_norm = normalize_company_name(contact_company)
-        if not contact_norm:
-            continue
-            
-        score = fuzz.token_sort_ratio(normalized_name, contact_norm)
-        if score >= thresholds['company_name']:
-            matches.append(contact)
-    
-    return matches
-
 def configure_column_mapping(settings):
     """Configure column mapping between input and target files"""
     if not settings.get('input_file') or not settings.get('target_file'):
@@ -882,8 +1026,8 @@ def configure_column_mapping(settings):
         input("Press Enter to continue...")
         return settings
         
-    input_df = try_read_csv(settings['input_file'])
-    target_df = try_read_csv(settings['target_file'])
+    input_df = read_contacts(settings['input_file'])
+    target_df = read_contacts(settings['target_file'])
     
     if input_df is None or target_df is None:
         print("\nError: Could not read input or target files")
@@ -1014,7 +1158,7 @@ def modify_settings(settings):
     while True:
         print("\nWhat would you like to modify?")
         print("1. Input Files")
-        print("2. Target File")
+        print("2. Target File(s)")
         print("3. Matching Thresholds")
         print("4. Column Mapping")
         print("5. Done")
@@ -1027,10 +1171,10 @@ def modify_settings(settings):
                 settings['input_files'] = files
                 print(f"\nSelected input files: {', '.join(files)}")
         elif choice == '2':
-            file = select_file("Select target file")
-            if file:
-                settings['target_file'] = file
-                print(f"\nSelected target file: {file}")
+            files = select_multiple_files("Select target files")
+            if files:
+                set_target_files(settings, files)
+                print(f"\nSelected target files: {', '.join(files)}")
         elif choice == '3':
             settings = modify_thresholds(settings)
         elif choice == '4':
@@ -1057,9 +1201,10 @@ def validate_settings(settings):
         print(f"\nInput file {settings['input_file']} not found")
         return False
         
-    if not os.path.exists(settings['target_file']):
-        print(f"\nTarget file {settings['target_file']} not found")
-        return False
+    for target_file in target_files(settings):
+        if not os.path.exists(target_file):
+            print(f"\nTarget file {target_file} not found")
+            return False
     
     return True
 
@@ -1075,33 +1220,56 @@ def main():
         
         print("\nMain Menu:")
         print("1. Select Input File")
-        print("2. Select Target File")
+        print("2. Select Target File(s)")
         print("3. Modify Thresholds")
         print("4. Configure Column Mapping")
         print("5. Run Program")
-        print("6. Exit")
+        print("6. Output Formats")
+        print("7. Query Match Store")
+        print("8. Deduplicate Sources")
+        print("9. Exit")
         
-        choice = input("\nEnter your choice (1-6): ").strip()
+        choice = input("\nEnter your choice (1-9): ").strip()
         
         if choice == '1':
             settings['input_file'] = select_file("Select input file")
         elif choice == '2':
-            settings['target_file'] = select_file("Select target file")
+            files = select_multiple_files("Select target file(s)")
+            if files:
+                set_target_files(settings, files)
         elif choice == '3':
             settings = modify_thresholds(settings)
         elif choice == '4':
             settings = configure_column_mapping(settings)
         elif choice == '5':
             if validate_settings(settings):
-                input_contacts = try_read_csv(settings['input_file'])
-                target_contacts = try_read_csv(settings['target_file'])
-                company_matches = find_matches(settings['input_file'], settings['target_file'], settings['thresholds'])
-                write_overlap_report(company_matches, settings['input_file'], settings['target_file'])
+                # Stream matches straight into the report files and the match store, one report per target
+                targets = target_files(settings)
+                with MatchStore(settings.get('match_store', MATCH_STORE_FILE)) as store:
+                    for target_file, company_matches in iter_target_matches(settings['input_file'], targets,
+                                                                             settings['thresholds'],
+                                                                             settings.get('incremental', True),
+                                                                             settings.get('memory_budget_mb',
+                                                                                          DEFAULT_MEMORY_BUDGET_MB)):
+                        run_id = store.start_run(settings['input_file'], target_file,
+                                                 settings['thresholds']['company_name'])
+                        output_base = 'company_overlaps'
+                        if len(targets) > 1:
+                            output_base += '_' + os.path.splitext(os.path.basename(target_file))[0]
+                        write_overlap_report(store.record_matches(run_id, company_matches),
+                                             settings['input_file'], target_file,
+                                             settings.get('output_formats', ['txt']), output_base)
                 input("\nPress Enter to return to main menu...")
             else:
                 print("\nPlease configure all required settings before running.")
                 input("Press Enter to continue...")
         elif choice == '6':
+            settings = select_output_formats(settings)
+        elif choice == '7':
+            query_match_store(settings)
+        elif choice == '8':
+            settings = deduplicate_sources(settings)
+        elif choice == '9':
             print("\nExiting program...")
             break
         else:
@@ -0,0 +1,199 @@
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+MATCH_STORE_FILE = "matches.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    target_file TEXT NOT NULL,
+    company_threshold INTEGER
+);
+CREATE TABLE IF NOT EXISTS companies (
+    code INTEGER PRIMARY KEY,
+    norm TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    first_name TEXT,
+    last_name TEXT,
+    email TEXT,
+    title TEXT,
+    company TEXT,
+    linkedin TEXT,
+    company_norm TEXT,
+    person_norm TEXT
+);
+CREATE TABLE IF NOT EXISTS candidates (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    company_code INTEGER NOT NULL REFERENCES companies(code),
+    source_company_norm TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (run_id, company_code, source_company_norm)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    company_code INTEGER NOT NULL REFERENCES companies(code),
+    contact_id INTEGER NOT NULL REFERENCES contacts(id),
+    score INTEGER,
+    has_person_match INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_matches_company_score ON matches(company_code, score);
+CREATE INDEX IF NOT EXISTS idx_matches_score ON matches(score);
+CREATE INDEX IF NOT EXISTS idx_candidates_company_score ON candidates(company_code, score);
+CREATE INDEX IF NOT EXISTS idx_contacts_run ON contacts(run_id);
+CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email);
+"""
+
+# Report field name -> contacts column
+CONTACT_COLUMNS = {
+    'First Name': 'first_name',
+    'Last Name': 'last_name',
+    'Email Address': 'email',
+    'Job Title': 'title',
+    'Company': 'company',
+    'LinkedIn': 'linkedin'
+}
+
+
+class MatchStore:
+    """SQLite file holding contacts, candidate scores and final matches across runs."""
+
+    def __init__(self, path: str = MATCH_STORE_FILE):
+        self.path = path
+        # Streamlit runs scripts on worker threads, so allow sharing the connection
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def start_run(self, source_file, target_file, company_threshold: Optional[int] = None) -> int:
+        """New run id, replacing earlier runs of the same source against the same target.
+
+        The replaced rows are only deleted when the new run's matches are
+        committed, so a failed run leaves the previous one in place.
+        """
+        previous = [row[0] for row in self.conn.execute(
+            "SELECT id FROM runs WHERE source_file = ? AND target_file = ?", (str(source_file), str(target_file))
+        )]
+        if previous:
+            marks = ', '.join('?' * len(previous))
+            for table in ('matches', 'candidates', 'contacts'):
+                self.conn.execute(f"DELETE FROM {table} WHERE run_id IN ({marks})", previous)
+            self.conn.execute(f"DELETE FROM runs WHERE id IN ({marks})", previous)
+        cur = self.conn.execute(
+            "INSERT INTO runs (started_at, source_file, target_file, company_threshold) VALUES (?, ?, ?, ?)",
+            (datetime.now(timezone.utc).isoformat(timespec='seconds'), str(source_file), str(target_file),
+             company_threshold)
+        )
+        return cur.lastrowid
+
+    def company_code(self, norm: str, name: str) -> int:
+        """Stable integer code for a normalized target company name"""
+        self.conn.execute("INSERT OR IGNORE INTO companies (norm, name) VALUES (?, ?)", (norm, name))
+        return self.conn.execute("SELECT code FROM companies WHERE norm = ?", (norm,)).fetchone()[0]
+
+    def add_contact(self, run_id: int, company_code: int, contact, score=None, has_person_match=False,
+                    company_norm: str = '', person_norm: str = ''):
+        """Store one matched contact (a dict-like with report field names).
+
+        company_norm is the contact's own normalized company; with a score it
+        is also recorded as a company-level candidate.
+        """
+        values = [str(contact.get(field, '') or '') for field in CONTACT_COLUMNS]
+        cur = self.conn.execute(
+            f"INSERT INTO contacts (run_id, {', '.join(CONTACT_COLUMNS.values())}, company_norm, person_norm) "
+            f"VALUES (?, {', '.join('?' * len(CONTACT_COLUMNS))}, ?, ?)",
+            [run_id] + values + [company_norm, person_norm]
+        )
+        self.conn.execute(
+            "INSERT INTO matches (run_id, company_code, contact_id, score, has_person_match) VALUES (?, ?, ?, ?, ?)",
+            (run_id, company_code, cur.lastrowid, score, int(bool(has_person_match)))
+        )
+        if company_norm and score is not None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO candidates (run_id, company_code, source_company_norm, score) VALUES (?, ?, ?, ?)",
+                (run_id, company_code, company_norm, score)
+            )
+
+    def add_company_match(self, run_id: int, match):
+        """Store one (company key, company name, contacts) match from leadmatcher5000"""
+        company_norm, company_name, contacts = match
+        code = self.company_code(company_norm, company_name)
+        for contact in contacts:
+            if isinstance(contact, dict) and 'score' in contact:
+                # A matched person pair: keep the connection, scored by person match
+                self.add_contact(run_id, code, contact['input_contact'], contact['score'], True)
+                continue
+            # ContactRecords carry their store, which holds the normalized keys
+            store = getattr(contact, 'store', None)
+            row = getattr(contact, 'row', None)
+            self.add_contact(
+                run_id, code, contact,
+                score=contact.get('company_score'),
+                has_person_match=contact.get('has_person_match', False),
+                company_norm=store.value('company_norm', row) if store is not None else '',
+                person_norm=store.value('person_norm', row) if store is not None else ''
+            )
+
+    def record_matches(self, run_id: int, company_matches: Iterable) -> Iterator:
+        """Pass matches through unchanged while storing each one; commits at the end"""
+        try:
+            for match in company_matches:
+                self.add_company_match(run_id, match)
+                yield match
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+    def who_we_know(self, company_norm: str, min_score: int = 0, partial: bool = False) -> List[Dict]:
+        """Contacts matched to a company at or above a score, newest run first.
+
+        With partial=True the company is found by substring of its normalized name.
+        """
+        if partial:
+            company_filter = "c.norm LIKE ?"
+            company_arg = f"%{company_norm}%"
+        else:
+            company_filter = "c.norm = ?"
+            company_arg = company_norm
+        rows = self.conn.execute(
+            f"""
+            SELECT c.name AS company, m.score, m.has_person_match,
+                   p.first_name, p.last_name, p.email, p.title, p.linkedin,
+                   r.source_file, r.started_at
+            FROM companies c
+            JOIN matches m ON m.company_code = c.code
+            JOIN contacts p ON p.id = m.contact_id
+            JOIN runs r ON r.id = m.run_id
+            WHERE {company_filter} AND m.score >= ?
+            ORDER BY r.id DESC, m.score DESC
+            """,
+            (company_arg, min_score)
+        ).fetchall()
+
+        # The same person can be stored by several runs; keep the newest
+        seen = set()
+        results = []
+        for row in rows:
+            key = (row['source_file'], row['first_name'], row['last_name'], row['email'])
+            if key not in seen:
+                seen.add(key)
+                results.append(dict(row))
+        return results
@@ -0,0 +1,25 @@
+"""Client for matching_service.py; kept free of the matcher's own dependencies."""
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+from urllib.request import Request, urlopen
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def match_remote(url: str, source_df: pd.DataFrame, thresholds: Optional[Dict[str, int]] = None,
+                 timeout: float = 600) -> Iterator[Dict]:
+    """Client side: send source contacts to a running service and yield its report rows"""
+    query = "&".join(f"{name}={int(value)}" for name, value in (thresholds or {}).items())
+    request = Request(f"{url.rstrip('/')}/match" + (f"?{query}" if query else ""),
+                      data=source_df.to_csv(index=False).encode('utf-8'),
+                      headers={"Content-Type": "text/csv"}, method="POST")
+    with urlopen(request, timeout=timeout) as response:
+        for line in response:
+            if line.strip():
+                row = json.loads(line)
+                if 'error' in row and len(row) == 1:
+                    raise RuntimeError(row['error'])
+                yield row
@@ -0,0 +1,328 @@
+"""Local HTTP/JSON matching service that keeps one target index warm for every caller.
+
+    python matching_service.py --target ideal.csv --port 8750
+
+Endpoints:
+    GET  /health  index size, running and queued jobs
+    POST /match   source contacts as CSV (text/csv) or JSON ({"contacts": [...]});
+                  thresholds can be overridden with query parameters such as
+                  ?company_name=90. Responds with JSONL, one report row per
+                  matched contact (the rows of company_overlaps.jsonl), sent
+                  one chunk per target company as soon as it is finished.
+
+Call it from Python with matching_client.match_remote().
+
+Jobs run on a fixed worker pool. Requests beyond the pool wait in a bounded
+queue; when that is full the service answers 503 with Retry-After.
+
+The pool is made of threads so every job reads the one warm index. Fuzzy
+scoring holds the GIL, so jobs share one core: more workers let a short
+request start while a long one runs, but do not add throughput. Run one
+service per core (on separate ports) to scale out.
+
+A job stops as soon as its client disconnects: the handler polls the
+connection while it waits for the next company, and the worker checks the
+job's cancelled event at every source company and contact.
+"""
+import argparse
+import io
+import json
+import queue
+import select
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import reports
+from contact_store import compact_frame
+from leadmatcher5000 import (SETTINGS_FILE, MatchCancelled, build_contact_store, build_target_index,
+                             iter_contact_matches, load_settings, read_contacts)
+
+DEFAULT_PORT = 8750
+MAX_WORKERS = 2
+MAX_QUEUED_JOBS = 8
+
+# Finished companies buffered between a worker and a slow client before the worker waits
+STREAM_BUFFER_COMPANIES = 100
+
+# Seconds a worker waits on a full buffer, and the handler on an empty one, before checking
+# whether the client is gone
+PUT_POLL_SECONDS = 0.5
+
+DEFAULT_THRESHOLDS = {
+    "company_name": 85,
+    "person_name": 85,
+    "email": 100,
+    "title": 70,
+    "department": 70
+}
+
+_DONE = object()
+
+
+class ServiceBusy(Exception):
+    """Raised when the worker pool and its queue are full"""
+
+
+class MatchStream:
+    """Report rows of one job, a list per target company; close() stops the job.
+
+    client_gone, if given, is polled while waiting for the worker; iteration
+    raises ConnectionAbortedError once it returns True.
+    """
+
+    def __init__(self, rows: queue.Queue, cancelled: threading.Event,
+                 client_gone: Optional[Callable[[], bool]] = None):
+        self.rows = rows
+        self.cancelled = cancelled
+        self.client_gone = client_gone
+
+    def __iter__(self) -> Iterator[List[Dict]]:
+        while True:
+            try:
+                company = self.rows.get(timeout=PUT_POLL_SECONDS)
+            except queue.Empty:
+                if self.client_gone is not None and self.client_gone():
+                    raise ConnectionAbortedError("client disconnected")
+                continue
+            if company is _DONE:
+                return
+            if isinstance(company, Exception):
+                raise company
+            yield company
+
+    def close(self):
+        """Stop the job, if it is still running, and free the buffer"""
+        self.cancelled.set()
+        # The worker sees the flag at its next contact or within PUT_POLL_SECONDS
+        while not self.rows.empty():
+            self.rows.get_nowait()
+
+
+class MatchingService:
+    """One warm target index shared by a bounded pool of match jobs"""
+
+    def __init__(self, target_file: str, thresholds: Dict[str, int], max_workers: int = MAX_WORKERS,
+                 max_queued: int = MAX_QUEUED_JOBS):
+        self.target_file = target_file
+        self.thresholds = thresholds
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="match")
+        self.lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+        self.completed = 0
+
+        started = time.perf_counter()
+        target_contacts = read_contacts(target_file)
+        if target_contacts is None:
+            raise ValueError(f"Could not read target file {target_file}")
+        self.index = build_target_index(target_contacts)
+        self.build_seconds = time.perf_counter() - started
+
+    def health(self) -> Dict:
+        with self.lock:
+            return {
+                "status": "ok",
+                "target_file": self.target_file,
+                "contacts": len(self.index),
+                "companies": len(self.index.norms),
+                "index_build_seconds": round(self.build_seconds, 3),
+                "workers": self.max_workers,
+                "running": self.running,
+                "queued": self.queued,
+                "completed": self.completed
+            }
+
+    def submit(self, source_df: pd.DataFrame, thresholds: Optional[Dict[str, int]] = None,
+               client_gone: Optional[Callable[[], bool]] = None) -> MatchStream:
+        """Queue a match job and return the stream of its report rows.
+
+        The caller must close the stream, whether or not it read it all;
+        closing it early stops the job at the next source company or contact.
+        """
+        with self.lock:
+            if self.running + self.queued >= self.max_workers + self.max_queued:
+                raise ServiceBusy()
+            self.queued += 1
+
+        rows = queue.Queue(maxsize=STREAM_BUFFER_COMPANIES)
+        cancelled = threading.Event()
+        self.executor.submit(self._run, source_df, {**self.thresholds, **(thresholds or {})}, rows, cancelled)
+        return MatchStream(rows, cancelled, client_gone)
+
+    def _run(self, source_df, thresholds, rows: queue.Queue, cancelled: threading.Event):
+        with self.lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            # The client may have left while the job was queued
+            if cancelled.is_set():
+                return
+            for match in iter_contact_matches(build_contact_store(source_df), self.index, thresholds,
+                                              cancelled=cancelled):
+                if not self._put(rows, list(reports.company_rows(match)), cancelled):
+                    return
+            self._put(rows, _DONE, cancelled)
+        except MatchCancelled:
+            pass
+        except Exception as e:
+            self._put(rows, e, cancelled)
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.completed += 1
+
+    @staticmethod
+    def _put(rows: queue.Queue, item, cancelled: threading.Event) -> bool:
+        """Hand an item to the client; False once the client is gone"""
+        while not cancelled.is_set():
+            try:
+                rows.put(item, timeout=PUT_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def read_request_contacts(body: bytes, content_type: str) -> pd.DataFrame:
+    """Source contacts from a CSV or JSON request body"""
+    if 'json' in content_type:
+        data = json.loads(body or b'{}')
+        contacts = data.get('contacts', []) if isinstance(data, dict) else data
+        df = pd.DataFrame(contacts, dtype=str)
+    else:
+        df = pd.read_csv(io.BytesIO(body), dtype=str)
+    df.columns = [str(col).strip() for col in df.columns]
+    return compact_frame(df.loc[:, ~df.columns.str.contains('^Unnamed')].copy())
+
+
+def make_handler(service: MatchingService):
+    class MatchHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status: int, data: Dict, headers: Optional[Dict[str, str]] = None):
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        def client_gone(self) -> bool:
+            """Whether the client has closed the connection; the request body is read, so EOF means gone"""
+            try:
+                readable, _, _ = select.select([self.connection], [], [], 0)
+                return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+            except OSError:
+                return True
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/health":
+                self.send_json(200, service.health())
+            else:
+                self.send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/match":
+                self.send_json(404, {"error": "not found"})
+                return
+
+            try:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                source_df = read_request_contacts(body, self.headers.get("Content-Type", ""))
+                thresholds = {name: int(values[-1]) for name, values in parse_qs(url.query).items()
+                              if name in DEFAULT_THRESHOLDS}
+            except (ValueError, pd.errors.ParserError) as e:
+                self.send_json(400, {"error": f"could not read contacts: {e}"})
+                return
+
+            try:
+                rows = service.submit(source_df, thresholds, self.client_gone)
+            except ServiceBusy:
+                self.send_json(503, {"error": "busy"}, {"Retry-After": "5"})
+                return
+
+            # Whatever goes wrong from here, closing the stream stops the job
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    # One chunk per target company, so a dropped client shows up at the next company
+                    for company in rows:
+                        if company:
+                            self.write_chunk("".join(json.dumps(row) + "\n" for row in company).encode('utf-8'))
+                except ConnectionError:
+                    raise
+                except Exception as e:
+                    # Headers are gone already; report the failure as the last line
+                    self.write_chunk((json.dumps({"error": str(e)}) + "\n").encode('utf-8'))
+                self.wfile.write(b"0\r\n\r\n")
+            except ConnectionError:
+                # BrokenPipe, ConnectionReset, or the stream noticing the client left
+                self.close_connection = True
+            finally:
+                rows.close()
+
+        def log_message(self, format, *args):
+            print(f"{self.address_string()} - {format % args}")
+
+    return MatchHandler
+
+
+def serve(target_file: str, thresholds: Dict[str, int], host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+          max_workers: int = MAX_WORKERS, max_queued: int = MAX_QUEUED_JOBS):
+    service = MatchingService(target_file, thresholds, max_workers, max_queued)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    print(f"Matching service for {target_file} ({len(service.index):,} contacts) on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve matches against a warm target index over HTTP")
+    parser.add_argument('--target', help="Target file (default: target_file from the settings file)")
+    parser.add_argument('--settings', default=SETTINGS_FILE, help="Settings file with thresholds")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="Match jobs run at once")
+    parser.add_argument('--max-queued', type=int, default=MAX_QUEUED_JOBS,
+                        help="Jobs allowed to wait before requests are refused with 503")
+    args = parser.parse_args()
+
+    settings = load_settings(args.settings) or {}
+    target_file = args.target or settings.get('target_file')
+    if not target_file:
+        parser.error(f"Need --target or a target_file in {args.settings}")
+
+    serve(target_file, {**DEFAULT_THRESHOLDS, **settings.get('thresholds', {})}, args.host, args.port,
+          args.workers, args.max_queued)
+
+
+if __name__ == "__main__":
+    main()
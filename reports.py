@@ -0,0 +1,297 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+# Report formats: 'txt' is the outreach report, the others carry the same rows for machines
+OUTPUT_FORMATS = ['txt', 'csv', 'jsonl', 'parquet']
+
+# Write through large buffers so each company is a handful of write calls
+WRITE_BUFFER_SIZE = 1 << 20
+PARQUET_BATCH_ROWS = 50_000
+
+# Contact fields shown for every contact, in report order
+CONTACT_COLUMNS = ['First Name', 'Last Name', 'Job Title', 'Email Address', 'LinkedIn', 'Company', 'Connected On']
+
+# One row per contact; prospect columns are only filled for matched person pairs
+REPORT_COLUMNS = (
+    ['Target Company Key', 'Target Company', 'Company Score', 'Match Score']
+    + CONTACT_COLUMNS
+    + ['Has Person Match']
+    + [f"Prospect {col}" for col in CONTACT_COLUMNS]
+)
+
+RULE = "-" * 50
+
+HEADER_TEMPLATE = (
+    "Contact Matching Results\n"
+    + "=" * 50 + "\n\n"
+    "These are the contacts that the Source person knows at the Target list of companies and people.\n\n"
+    "Source File: {input_file}\n"
+    "Target File: {target_file}\n\n"
+    "Summary\n"
+    + "-" * 30 + "\n"
+    "Total contacts matched: {total_contacts}\n"
+    "Companies with matches: {total_companies}\n"
+    "Source: {input_file}\n"
+    "Target companies: {target_file}\n\n"
+    "Contacts by Target Company\n"
+    + "=" * 50 + "\n\n"
+)
+
+COMPANY_TEMPLATE = (
+    "\nCompany: {company}\n"
+    "Number of contacts: {count}\n"
+    + RULE + "\n\n"
+)
+
+CONTACT_TEMPLATE = (
+    "{prefix}Name: {name}\n"
+    "{prefix}Title: {title}\n"
+    "{prefix}Email: {email}\n"
+    "{prefix}LinkedIn: {linkedin}\n"
+    "{prefix}Company: {company}\n"
+)
+
+MATCH_SCORE_TEMPLATE = "Match Score: {score:.1f}%\n"
+
+
+def is_person_pair(person) -> bool:
+    """True for matched pairs ({'score', 'input_contact', 'target_contact'}), False for plain contacts"""
+    return isinstance(person, dict) and 'score' in person
+
+
+def _field(contact_data, name: str) -> str:
+    value = contact_data.get(name, '')
+    return value.strip() if isinstance(value, str) else ('' if value is None else str(value))
+
+
+def format_contact(contact_data, prefix: str = "") -> str:
+    """Render one contact block of the text report"""
+    connected_on = _field(contact_data, 'Connected On')
+    text = CONTACT_TEMPLATE.format(
+        prefix=prefix,
+        name=f"{contact_data.get('First Name', '')} {contact_data.get('Last Name', '')}".strip(),
+        title=_field(contact_data, 'Job Title') or 'Not Available',
+        email=_field(contact_data, 'Email Address') or 'Not Available',
+        linkedin=_field(contact_data, 'LinkedIn') or 'Not Available',
+        company=_field(contact_data, 'Company') or 'Not Available'
+    )
+    if connected_on:
+        text += f"{prefix}Connected On: {connected_on}\n"
+    return text + prefix + RULE + "\n"
+
+
+def format_company(match) -> str:
+    """Render one target company with all its contacts"""
+    _, company_name, contacts = match
+    parts = [COMPANY_TEMPLATE.format(company=company_name, count=len(contacts))]
+    for person in contacts:
+        if is_person_pair(person):
+            # This is a matched contact
+            parts.append(MATCH_SCORE_TEMPLATE.format(score=person['score']))
+            parts.append("\nYour Connection:\n")
+            parts.append(format_contact(person['input_contact'], "  "))
+            parts.append("\nProspect:\n")
+            parts.append(format_contact(person['target_contact'], "  "))
+        else:
+            # This is an unmatched contact
+            parts.append(format_contact(person, "  "))
+        parts.append(RULE + "\n\n")
+    return "".join(parts)
+
+
+def company_rows(match) -> List[Dict]:
+    """Flatten one company match into report rows"""
+    company_key, company_name, contacts = match
+    rows = []
+    for person in contacts:
+        row = dict.fromkeys(REPORT_COLUMNS)
+        row['Target Company Key'] = company_key
+        row['Target Company'] = company_name
+        if is_person_pair(person):
+            row['Match Score'] = float(person['score'])
+            contact, prospect = person['input_contact'], person['target_contact']
+            row['Has Person Match'] = True
+            for col in CONTACT_COLUMNS:
+                row[f"Prospect {col}"] = _field(prospect, col)
+        else:
+            contact = person
+            row['Has Person Match'] = bool(person.get('has_person_match', False))
+            if person.get('company_score') is not None:
+                row['Company Score'] = float(person.get('company_score'))
+        for col in CONTACT_COLUMNS:
+            row[col] = _field(contact, col)
+        rows.append(row)
+    return rows
+
+
+def overlap_rows(company_matches: Iterable) -> List[Dict]:
+    """Flatten company matches into one row per contact for structured output"""
+    return [row for match in company_matches for row in company_rows(match)]
+
+
+class OverlapReportWriter:
+    """Stream company matches into company_overlaps.* in every requested format.
+
+    Structured formats are appended as each company arrives. The text body
+    is spooled to a temp file because its summary header needs the totals,
+    then copied behind the header on close. Every output is written to a
+    temp file next to it and only replaces the previous report once the
+    run finishes; a run that fails leaves the previous report as it was.
+    """
+
+    def __init__(self, input_file, target_file, formats: Iterable[str] = ('txt',),
+                 output_base: str = 'company_overlaps'):
+        self.input_file = input_file
+        self.target_file = target_file
+        self.formats = [fmt for fmt in OUTPUT_FORMATS if fmt in formats]
+        self.output_base = output_base
+        self.total_contacts = 0
+        self.total_companies = 0
+
+        self._text_body = None
+        self._csv_file = None
+        self._csv_writer = None
+        self._jsonl_file = None
+        self._parquet_writer = None
+        self._parquet_rows: List[Dict] = []
+        # Format -> temp file its output goes to until close()
+        self._temp_paths: Dict[str, str] = {}
+
+    def path(self, fmt: str) -> str:
+        return f"{self.output_base}.{fmt}"
+
+    def _temp_path(self, fmt: str) -> str:
+        """Unique temp file name next to the output, so os.replace never crosses file systems"""
+        temp_path = f"{self.path(fmt)}.{uuid.uuid4().hex[:12]}.tmp"
+        self._temp_paths[fmt] = temp_path
+        return temp_path
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def open(self):
+        for fmt in self.formats:
+            print(f"Writing results to {self.path(fmt)}...")
+        if 'txt' in self.formats:
+            self._text_body = tempfile.SpooledTemporaryFile(max_size=64 * WRITE_BUFFER_SIZE, mode='w+', encoding='utf-8')
+        if 'csv' in self.formats:
+            self._csv_file = open(self._temp_path('csv'), 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+            self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=REPORT_COLUMNS)
+            self._csv_writer.writeheader()
+        if 'jsonl' in self.formats:
+            self._jsonl_file = open(self._temp_path('jsonl'), 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+
+    def write(self, match):
+        """Add one (company key, company name, contacts) match"""
+        # Companies without contacts still count towards the summary
+        self.total_companies += 1
+        self.total_contacts += len(match[2])
+        if not match[2]:
+            return
+
+        if self._text_body is not None:
+            self._text_body.write(format_company(match))
+
+        if self._csv_writer or self._jsonl_file or 'parquet' in self.formats:
+            rows = company_rows(match)
+            if self._csv_writer:
+                self._csv_writer.writerows(rows)
+            if self._jsonl_file:
+                self._jsonl_file.write("".join(json.dumps(row) + "\n" for row in rows))
+            if 'parquet' in self.formats:
+                self._parquet_rows.extend(rows)
+                if len(self._parquet_rows) >= PARQUET_BATCH_ROWS:
+                    self._flush_parquet()
+
+    def write_all(self, company_matches: Iterable):
+        for match in company_matches:
+            self.write(match)
+
+    def _flush_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema(
+            [(col, pa.float64() if col in ('Company Score', 'Match Score') else pa.bool_() if col == 'Has Person Match' else pa.string())
+             for col in REPORT_COLUMNS]
+        )
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self._temp_path('parquet'), schema)
+        table = pa.Table.from_pylist(self._parquet_rows, schema=schema)
+        self._parquet_writer.write_table(table)
+        self._parquet_rows = []
+
+    def _close_files(self):
+        if self._text_body is not None:
+            self._text_body.close()
+            self._text_body = None
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = self._csv_writer = None
+        if self._jsonl_file is not None:
+            self._jsonl_file.close()
+            self._jsonl_file = None
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def abort(self):
+        """Drop the unfinished outputs, keeping any previous report"""
+        self._close_files()
+        for temp_path in self._temp_paths.values():
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+        self._temp_paths = {}
+
+    def close(self):
+        """Finish every output and move it into place"""
+        try:
+            self._finish()
+        except BaseException:
+            self.abort()
+            raise
+        for fmt, temp_path in self._temp_paths.items():
+            os.replace(temp_path, self.path(fmt))
+        self._temp_paths = {}
+
+        written = ", ".join(self.path(fmt) for fmt in self.formats)
+        print(f"Matching complete! Results written to {written}")
+        print(f"Total contacts matched: {self.total_contacts}")
+        print(f"Companies with matches: {self.total_companies}")
+
+    def _finish(self):
+        if self._text_body is not None:
+            with open(self._temp_path('txt'), 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(HEADER_TEMPLATE.format(
+                    input_file=self.input_file,
+                    target_file=self.target_file,
+                    total_contacts=self.total_contacts,
+                    total_companies=self.total_companies
+                ))
+                self._text_body.seek(0)
+                shutil.copyfileobj(self._text_body, f, WRITE_BUFFER_SIZE)
+        if 'parquet' in self.formats and (self._parquet_rows or self._parquet_writer is None):
+            self._flush_parquet()
+        self._close_files()
+
+
+def write_report(company_matches: Iterable, input_file, target_file, formats: Optional[Iterable[str]] = None,
+                 output_base: str = 'company_overlaps') -> OverlapReportWriter:
+    """Write matches (a list or a generator) in the given formats"""
+    with OverlapReportWriter(input_file, target_file, formats or ['txt'], output_base) as writer:
+        writer.write_all(company_matches)
+    return writer
@@ -0,0 +1,103 @@
+import re
+from typing import Dict, List, Tuple
+
+# Code of a title or department the taxonomy does not cover
+UNMAPPED = 0
+
+# A role code packs the seniority level above the function: level << FUNCTION_BITS | function
+FUNCTION_BITS = 8
+FUNCTION_MASK = (1 << FUNCTION_BITS) - 1
+
+# Seniority levels, checked in order; a title takes the first level with a phrase in it.
+# Titles naming only a function (e.g. "software engineer") get the last level.
+SENIORITY_LEVELS: List[Tuple[str, List[str]]] = [
+    ('vice president', ['vice president', 'evp']),
+    ('executive', ['chief', 'president', 'founder', 'cofounder', 'owner', 'partner', 'managing director']),
+    ('director', ['director', 'head']),
+    ('manager', ['manager', 'supervisor', 'lead', 'team lead']),
+    ('senior', ['senior', 'principal', 'staff']),
+    ('entry', ['junior', 'associate', 'assistant', 'intern', 'trainee', 'apprentice']),
+    ('individual', []),
+]
+
+# Functions by the phrases that name them. When a title names several, the one
+# ending last wins ("vice president sales" is sales), then the longest phrase.
+# Titles naming a seniority only ("president", "owner", "team lead") have no
+# function and are fuzzy matched, so keep the functions narrow.
+FUNCTIONS: List[Tuple[str, List[str]]] = [
+    ('executive', ['executive', 'chief executive', 'general manager', 'general management', 'leadership']),
+    ('finance', ['finance', 'financial', 'accounting', 'accountant', 'controller', 'treasurer', 'treasury',
+                 'audit', 'auditor', 'tax', 'payroll', 'investor relations']),
+    ('technology', ['technology']),
+    ('information technology', ['information', 'information technology', 'it', 'infrastructure', 'systems',
+                                'network', 'helpdesk', 'help desk', 'technical support']),
+    ('engineering', ['engineer', 'engineering', 'developer', 'development', 'software', 'devops', 'programmer']),
+    ('data', ['data', 'analytics', 'data science', 'data scientist', 'data engineer', 'data engineering',
+              'business intelligence', 'machine learning']),
+    ('architecture', ['architect', 'architecture']),
+    ('security', ['security', 'cybersecurity', 'information security', 'risk']),
+    ('operations', ['operations', 'operating', 'supply chain', 'logistics', 'procurement', 'purchasing',
+                    'facilities', 'manufacturing', 'production']),
+    ('sales', ['sales', 'account executive', 'account manager', 'business development', 'revenue',
+               'partnerships']),
+    ('marketing', ['marketing', 'brand', 'communications', 'content', 'growth', 'public relations']),
+    ('customer service', ['customer success', 'customer service', 'customer support', 'customer experience']),
+    ('human resources', ['human resources', 'hr', 'people', 'talent', 'recruiter', 'recruiting',
+                         'recruitment']),
+    ('legal', ['legal', 'counsel', 'general counsel', 'attorney', 'lawyer', 'compliance', 'paralegal']),
+    ('product', ['product', 'product management']),
+    ('design', ['design', 'designer', 'ux', 'creative']),
+    ('administration', ['administrative', 'administration', 'office manager', 'receptionist',
+                        'executive assistant']),
+]
+
+
+def _phrase_table(groups: List[Tuple[str, List[str]]]) -> Dict[Tuple[str, ...], int]:
+    # Phrase tokens -> 1-based group number
+    return {tuple(phrase.split()): number
+            for number, (_, phrases) in enumerate(groups, 1) for phrase in phrases}
+
+
+_LEVEL_PHRASES = _phrase_table(SENIORITY_LEVELS)
+_FUNCTION_PHRASES = _phrase_table(FUNCTIONS)
+_MAX_PHRASE_TOKENS = max(len(phrase) for phrase in [*_LEVEL_PHRASES, *_FUNCTION_PHRASES])
+_INDIVIDUAL = len(SENIORITY_LEVELS)
+
+
+def role_code(title: str) -> int:
+    """Role code of a normalized title (see normalize_job_title), UNMAPPED if it has no known phrase"""
+    # normalize_job_title keeps punctuation ("vice president, sales"), so split on words
+    tokens = re.findall(r'\w+', str(title))
+    level = _INDIVIDUAL + 1
+    # (end position, phrase length, function) of the winning function phrase
+    best = (-1, 0, UNMAPPED)
+    for start in range(len(tokens)):
+        for length in range(1, min(_MAX_PHRASE_TOKENS, len(tokens) - start) + 1):
+            phrase = tuple(tokens[start:start + length])
+            level = min(level, _LEVEL_PHRASES.get(phrase, level))
+            function = _FUNCTION_PHRASES.get(phrase)
+            if function is not None:
+                best = max(best, (start + length - 1, length, function))
+
+    function = best[2]
+    if level > _INDIVIDUAL:
+        if function == UNMAPPED:
+            return UNMAPPED
+        level = _INDIVIDUAL
+    return level << FUNCTION_BITS | function
+
+
+def function_code(department: str) -> int:
+    """Function number of a normalized department name, UNMAPPED if it has none"""
+    return role_code(department) & FUNCTION_MASK
+
+
+def has_function(code: int) -> bool:
+    """Whether a role code names a function; titles without one are fuzzy matched instead"""
+    return code & FUNCTION_MASK != UNMAPPED
+
+
+def roles_agree(a: int, b: int) -> bool:
+    """Same seniority level and the same function, which both codes must name"""
+    return has_function(a) and a == b
+
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Set
+
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+STATE_DIR = ".leadmatcher_state"
+STATE_VERSION = 2
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Content hash per row, independent of column order and dtype"""
+    if df.empty:
+        return np.array([], dtype=np.uint64)
+    columns = sorted(df.columns)
+    return pd.util.hash_pandas_object(df[columns].astype(object), index=False).to_numpy(dtype=np.uint64)
+
+
+def state_path(input_file, target_file, state_dir: str = STATE_DIR) -> str:
+    """One state file per source/target pair"""
+    key = f"{os.path.abspath(str(input_file))}|{os.path.abspath(str(target_file))}"
+    return os.path.join(state_dir, f"run_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.json")
+
+
+class RunState:
+    """Company match decisions from the previous run, keyed by source row hash.
+
+    Unchanged source rows keep their previous decisions and are only scored
+    against target companies that are new since that run. Added or changed
+    rows are scored in full; deleted rows and companies simply drop out.
+    """
+
+    def __init__(self, path: str, company_threshold: int, previous: Optional[Dict] = None):
+        self.path = path
+        self.company_threshold = company_threshold
+        self.previous = previous
+        # Filled in by the current run
+        self.source_hashes = np.array([], dtype=np.uint64)
+        self.target_hashes = np.array([], dtype=np.uint64)
+        self.target_norms: List[str] = []
+        self.target_rows: Set[str] = set()
+        self.links: Dict[str, Dict[str, int]] = {}
+        self.source_rows: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, input_file, target_file, company_threshold: int, state_dir: str = STATE_DIR) -> 'RunState':
+        """Load the previous state, ignoring it when missing, unreadable or made with another threshold"""
+        path = state_path(input_file, target_file, state_dir)
+        previous = None
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('version') == STATE_VERSION and data.get('company_threshold') == company_threshold:
+                previous = data
+        except (FileNotFoundError, ValueError):
+            pass
+        return cls(path, company_threshold, previous)
+
+    def begin(self, source_df: pd.DataFrame, target_df: pd.DataFrame):
+        """Hash the rows of the current run"""
+        self.source_hashes = row_hashes(source_df)
+        self.target_hashes = row_hashes(target_df)
+
+    def known_links(self) -> Dict[str, Dict[str, int]]:
+        """Previous target matches and scores for each source company norm that has an unchanged row"""
+        if not self.previous:
+            return {}
+        source_norms = self.previous['source_norms']
+        links = self.previous['links']
+        rows = self.previous['source_rows']
+        known = {}
+        for row_hash in self.source_hashes:
+            norm_idx = rows.get(str(row_hash))
+            if norm_idx is None:
+                continue
+            norm = source_norms[norm_idx]
+            if norm not in known:
+                known[norm] = {self.previous['target_norms'][idx]: score for idx, score in links[norm_idx]}
+        return known
+
+    def previous_target_norms(self) -> Set[str]:
+        return set(self.previous['target_norms']) if self.previous else set()
+
+    def delta(self) -> List[str]:
+        """Human readable counts of added/removed rows since the previous run"""
+        if not self.previous:
+            return ["No previous run state, matching everything"]
+        old_source = set(self.previous['source_rows'])
+        old_target = set(self.previous['target_rows'])
+        new_source = {str(h) for h in self.source_hashes}
+        new_target = {str(h) for h in self.target_hashes}
+        return [
+            f"Source rows: {len(new_source - old_source):,} new/changed, {len(old_source - new_source):,} removed",
+            f"Target rows: {len(new_target - old_target):,} new/changed, {len(old_target - new_target):,} removed"
+        ]
+
+    def record(self, source_norms: List[str], source_norm_codes: np.ndarray,
+               target_norms: List[str], links: Dict[str, Dict[str, int]]):
+        """Remember this run's decisions for the next one"""
+        self.target_norms = list(target_norms)
+        self.target_rows = {str(h) for h in self.target_hashes}
+        self.links = links
+        self.source_rows = {
+            str(row_hash): source_norms[code]
+            for row_hash, code in zip(self.source_hashes, source_norm_codes) if code >= 0
+        }
+
+    def save(self):
+        """Write the state atomically so an interrupted run keeps the old one"""
+        target_index = {norm: idx for idx, norm in enumerate(self.target_norms)}
+        source_norms = list(self.links)
+        source_index = {norm: idx for idx, norm in enumerate(source_norms)}
+        data = {
+            'version': STATE_VERSION,
+            'company_threshold': self.company_threshold,
+            'target_norms': self.target_norms,
+            'target_rows': sorted(self.target_rows),
+            'source_norms': source_norms,
+            'links': [[[target_index[norm], score] for norm, score in self.links[source_norm].items()]
+                      for source_norm in source_norms],
+            'source_rows': {row_hash: source_index[norm] for row_hash, norm in self.source_rows.items()
+                            if norm in source_index}
+        }
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,250 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from lazy_imports import lazy_module
+
+fuzz = lazy_module('fuzzywuzzy.fuzz')
+utils = lazy_module('fuzzywuzzy.utils')
+
+# Scorer names understood by score()
+TOKEN_SORT = 'token_sort'
+TOKEN_SET = 'token_set'
+PARTIAL = 'partial'
+
+# The combination person matching has always used
+ALL_SCORERS = (TOKEN_SORT, TOKEN_SET, PARTIAL)
+
+PREPARED_CACHE_SIZE = 200_000
+
+# Rough resident bytes per PairCache entry: key tuple, score and dict slot
+PAIR_CACHE_ENTRY_BYTES = 200
+
+
+class PreparedString:
+    """A string tokenized and sorted once so every scorer can reuse the work."""
+    __slots__ = ('raw', 'processed', 'sorted_tokens', 'token_set', 'set_length')
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        # Same preprocessing fuzzywuzzy applies inside each scorer call
+        self.processed = utils.full_process(raw, force_ascii=True)
+        tokens = self.processed.split()
+        self.sorted_tokens = " ".join(sorted(tokens)).strip()
+        self.token_set = frozenset(tokens)
+        self.set_length = len(" ".join(self.token_set))
+
+    def __repr__(self):
+        return f"PreparedString({self.raw!r})"
+
+
+@lru_cache(maxsize=PREPARED_CACHE_SIZE)
+def prepare(value) -> PreparedString:
+    """Return the cached PreparedString for a value"""
+    return PreparedString('' if value is None else str(value))
+
+
+def _as_prepared(value) -> PreparedString:
+    return value if isinstance(value, PreparedString) else prepare(value)
+
+
+def ratio_upper_bound(len1: int, len2: int) -> int:
+    """Best possible fuzz.ratio for two strings of the given lengths"""
+    if not len1 or not len2:
+        # Two empty strings are equivalent, one empty string never matches
+        return 100 if len1 == len2 else 0
+    return utils.intr(200 * min(len1, len2) / (len1 + len2))
+
+
+def _token_set_ratio(a: PreparedString, b: PreparedString, score_cutoff: int = 0) -> int:
+    """fuzz.token_set_ratio computed from prepared token sets"""
+    if not a.processed or not b.processed:
+        return 0
+
+    intersection = a.token_set & b.token_set
+    if not intersection and ratio_upper_bound(a.set_length, b.set_length) < score_cutoff:
+        # With nothing shared the score is a plain ratio of the two token lists
+        return 0
+    sorted_sect = " ".join(sorted(intersection))
+    sorted_1to2 = " ".join(sorted(a.token_set - intersection))
+    sorted_2to1 = " ".join(sorted(b.token_set - intersection))
+
+    combined_1to2 = (sorted_sect + " " + sorted_1to2).strip()
+    combined_2to1 = (sorted_sect + " " + sorted_2to1).strip()
+    sorted_sect = sorted_sect.strip()
+
+    return max(
+        fuzz.ratio(sorted_sect, combined_1to2),
+        fuzz.ratio(sorted_sect, combined_2to1),
+        fuzz.ratio(combined_1to2, combined_2to1)
+    )
+
+
+def score(a, b, scorers: Iterable[str] = ALL_SCORERS, score_cutoff: int = 0) -> int:
+    """Best score of the requested scorers, sharing one tokenization per string.
+
+    Accepts raw strings or PreparedString values. Returns 0 as soon as the
+    cutoff cannot be reached, and stops early on a perfect score.
+    """
+    a = _as_prepared(a)
+    b = _as_prepared(b)
+    scorers = tuple(scorers)
+
+    best = 0
+    # Cheapest scorer first; token_sort also bounds the work for token_set
+    if TOKEN_SORT in scorers:
+        if ratio_upper_bound(len(a.sorted_tokens), len(b.sorted_tokens)) >= score_cutoff:
+            best = fuzz.ratio(a.sorted_tokens, b.sorted_tokens)
+            if best == 100:
+                return best
+
+    if TOKEN_SET in scorers:
+        best = max(best, _token_set_ratio(a, b, score_cutoff))
+        if best == 100:
+            return best
+
+    if PARTIAL in scorers:
+        best = max(best, fuzz.partial_ratio(a.raw, b.raw))
+
+    return best if best >= score_cutoff else 0
+
+
+def upper_bound(a, b, scorers: Iterable[str] = ALL_SCORERS) -> int:
+    """Best score the scorers could give, from string lengths and shared tokens only"""
+    a = _as_prepared(a)
+    b = _as_prepared(b)
+    scorers = tuple(scorers)
+
+    bound = 0
+    if TOKEN_SORT in scorers:
+        bound = ratio_upper_bound(len(a.sorted_tokens), len(b.sorted_tokens))
+    if TOKEN_SET in scorers:
+        if not a.processed or not b.processed:
+            pass
+        elif a.token_set.isdisjoint(b.token_set):
+            bound = max(bound, ratio_upper_bound(a.set_length, b.set_length))
+        else:
+            return 100
+    if PARTIAL in scorers:
+        # A short string can sit entirely inside a long one, so only empties are bounded
+        bound = max(bound, ratio_upper_bound(min(len(a.raw), 1), min(len(b.raw), 1)))
+    return bound
+
+
+class PruneStats:
+    """Count scored and pruned pairs per matching stage"""
+
+    def __init__(self):
+        self.stages: Dict[str, List[int]] = {}
+
+    def record(self, stage: str, pruned: bool):
+        counts = self.stages.setdefault(stage, [0, 0])
+        counts[0] += 1
+        if pruned:
+            counts[1] += 1
+
+    def pruned(self, stage: str) -> int:
+        return self.stages.get(stage, [0, 0])[1]
+
+    def summary(self) -> List[str]:
+        """One line per stage, e.g. 'company: 1,200 of 1,500 pairs pruned (80.0%)'"""
+        lines = []
+        for stage, (pairs, pruned) in self.stages.items():
+            percent = pruned / pairs * 100 if pairs else 0
+            lines.append(f"{stage}: {pruned:,} of {pairs:,} pairs pruned ({percent:.1f}%)")
+        return lines
+
+
+def pruned_score(a, b, threshold: int, scorers: Iterable[str] = ALL_SCORERS,
+                 stats: Optional[PruneStats] = None, stage: str = 'default') -> int:
+    """Score a pair against a threshold, skipping the scorer when the bound rules it out"""
+    a = _as_prepared(a)
+    b = _as_prepared(b)
+    scorers = tuple(scorers)
+
+    pruned = upper_bound(a, b, scorers) < threshold
+    if stats is not None:
+        stats.record(stage, pruned)
+    if pruned:
+        return 0
+    return score(a, b, scorers, score_cutoff=threshold)
+
+
+class PairCache:
+    """Bounded memo of pair scores keyed on (stage, code_a, code_b).
+
+    Codes number the distinct values of one store each (ContactStore codes),
+    so a cache belongs to one source and target pair and one set of
+    thresholds. Once full, the oldest entries make room for new ones.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self.scores: Dict[Tuple[str, int, int], int] = {}
+        # stage -> [lookups, hits]
+        self.lookups: Dict[str, List[int]] = {}
+
+    @classmethod
+    def for_budget(cls, budget_bytes: int) -> 'PairCache':
+        return cls(budget_bytes // PAIR_CACHE_ENTRY_BYTES)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def score(self, stage: str, code_a: int, code_b: int, a, b, threshold: int,
+              scorers: Iterable[str] = ALL_SCORERS, stats: Optional[PruneStats] = None) -> int:
+        """pruned_score(a, b), computed once per pair of codes"""
+        counts = self.lookups.setdefault(stage, [0, 0])
+        counts[0] += 1
+        key = (stage, code_a, code_b)
+        result = self.scores.get(key)
+        if result is not None:
+            counts[1] += 1
+            return result
+
+        result = pruned_score(a, b, threshold, scorers, stats, stage)
+        if len(self.scores) >= self.max_entries:
+            del self.scores[next(iter(self.scores))]
+        self.scores[key] = result
+        return result
+
+    def summary(self) -> List[str]:
+        """One line per stage, e.g. 'title: 9,500 of 9,800 lookups hit (96.9%)'"""
+        lines = []
+        for stage, (lookups, hits) in self.lookups.items():
+            percent = hits / lookups * 100 if lookups else 0
+            lines.append(f"{stage}: {hits:,} of {lookups:,} lookups hit ({percent:.1f}%)")
+        return lines
+
+
+def best_match(query, choices: Sequence, threshold: int, scorers: Iterable[str] = ALL_SCORERS,
+               stats: Optional[PruneStats] = None, stage: str = 'default') -> Optional[Tuple[str, int, int]]:
+    """Drop-in for process.extractOne with pruning; returns (choice, score, index) or None.
+
+    The cutoff rises with the best score found so far, so later candidates
+    are pruned harder. Ties keep the first choice, like extractOne.
+    """
+    query = _as_prepared(query)
+    scorers = tuple(scorers)
+
+    best = None
+    cutoff = threshold
+    for idx, choice in enumerate(choices):
+        result = pruned_score(query, choice, cutoff, scorers, stats, stage)
+        if result >= cutoff and result > 0:
+            best = (choice.raw if isinstance(choice, PreparedString) else choice, result, idx)
+            if result == 100:
+                break
+            cutoff = result + 1
+    return best
+
+
+def scorer(scorers: Tuple[str, ...] = ALL_SCORERS):
+    """Build a two-argument scorer usable with fuzzywuzzy.process"""
+    def _scorer(s1, s2):
+        return score(s1, s2, scorers)
+    return _scorer
+
+
+# Ready-made scorers for process.extractOne and friends
+combined_scorer = scorer(ALL_SCORERS)
+token_sort_scorer = scorer((TOKEN_SORT,))
@@ -0,0 +1,266 @@
+"""Watch an inbox folder and match every new contact export against a warm target index.
+
+    python watch_folder.py --inbox inbox --outbox outbox
+
+The target file and thresholds come from matcher_settings.json unless given
+on the command line. Reports for inbox/<name>.csv are written to
+outbox/<name>_company_overlaps.*; processed files move to inbox/processed
+(or inbox/failed when matching raises).
+"""
+import argparse
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+import reports
+from leadmatcher5000 import (CONTACT_EXTENSIONS, SETTINGS_FILE, build_contact_store, build_target_index,
+                             iter_contact_matches, load_settings, print_box, read_contacts)
+from match_store import MATCH_STORE_FILE, MatchStore
+
+# A file is picked up once its size has not changed for this many seconds
+QUIET_SECONDS = 2.0
+
+# Files waiting to be matched; the watcher blocks when this many are queued
+MAX_QUEUED_FILES = 16
+
+PROCESSED_DIR = "processed"
+FAILED_DIR = "failed"
+
+
+def is_contact_file(path: str) -> bool:
+    name = os.path.basename(path)
+    # Skip hidden and temporary files written by exporters and editors
+    if name.startswith(('.', '~$')):
+        return False
+    return name.lower().endswith(CONTACT_EXTENSIONS)
+
+
+class InboxHandler(FileSystemEventHandler):
+    """Note contact files as they are created, written or moved into the inbox"""
+
+    def __init__(self, debouncer: 'Debouncer'):
+        self.debouncer = debouncer
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.debouncer.touch(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.debouncer.touch(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.debouncer.touch(event.dest_path)
+
+
+class Debouncer:
+    """Hold files until they have been quiet for QUIET_SECONDS, then queue them once"""
+
+    def __init__(self, work_queue: queue.Queue, inbox: str, quiet_seconds: float = QUIET_SECONDS):
+        self.work_queue = work_queue
+        self.inbox = os.path.abspath(inbox)
+        self.quiet_seconds = quiet_seconds
+        # path -> (last event time, size seen then)
+        self.pending: Dict[str, tuple] = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def touch(self, path: str):
+        path = os.path.abspath(path)
+        # Only files directly in the inbox; processed/ and failed/ are ours
+        if os.path.dirname(path) != self.inbox or not is_contact_file(path):
+            return
+        with self.lock:
+            self.pending[path] = (time.monotonic(), file_size(path))
+
+    def run(self):
+        while not self.stopped.wait(self.quiet_seconds / 4):
+            now = time.monotonic()
+            ready = []
+            with self.lock:
+                for path, (seen, size) in list(self.pending.items()):
+                    if now - seen < self.quiet_seconds:
+                        continue
+                    current = file_size(path)
+                    if current is None:
+                        # Deleted or renamed away before it settled
+                        del self.pending[path]
+                    elif current != size:
+                        # Still being written without events (e.g. network shares)
+                        self.pending[path] = (now, current)
+                    else:
+                        del self.pending[path]
+                        ready.append(path)
+            for path in ready:
+                # Blocks while the worker is behind, which keeps memory bounded
+                self.work_queue.put(path)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def file_size(path: str) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def move_into(path: str, folder: str) -> str:
+    """Move a file into folder, keeping older files of the same name"""
+    os.makedirs(folder, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    destination = os.path.join(folder, stem + ext)
+    if os.path.exists(destination):
+        destination = os.path.join(folder, f"{stem}_{time.strftime('%Y%m%d_%H%M%S')}{ext}")
+    shutil.move(path, destination)
+    return destination
+
+
+class MatchWorker:
+    """Match queued files one at a time against a target index built once.
+
+    The index is rebuilt only when the target file changes on disk.
+    """
+
+    def __init__(self, work_queue: queue.Queue, target_file: str, thresholds: Dict[str, int], outbox: str,
+                 formats, match_store: Optional[str] = MATCH_STORE_FILE):
+        self.work_queue = work_queue
+        self.target_file = target_file
+        self.thresholds = thresholds
+        self.outbox = outbox
+        self.formats = formats
+        self.match_store = match_store
+        self.index = None
+        self.index_mtime = None
+
+    def target_index(self):
+        mtime = os.path.getmtime(self.target_file)
+        if self.index is None or mtime != self.index_mtime:
+            started = time.perf_counter()
+            target_contacts = read_contacts(self.target_file)
+            if target_contacts is None:
+                raise ValueError(f"Could not read target file {self.target_file}")
+            self.index = build_target_index(target_contacts)
+            self.index_mtime = mtime
+            print_box("Target Index", [
+                f"Target: {self.target_file}",
+                f"Contacts: {len(self.index):,}",
+                f"Companies: {len(self.index.norms):,}",
+                f"Built in {time.perf_counter() - started:.1f}s"
+            ])
+        return self.index
+
+    def process(self, path: str):
+        started = time.perf_counter()
+        input_contacts = read_contacts(path)
+        if input_contacts is None:
+            raise ValueError(f"Could not read {path}")
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output_base = os.path.join(self.outbox, f"{stem}_company_overlaps")
+        company_matches = iter_contact_matches(build_contact_store(input_contacts), self.target_index(),
+                                               self.thresholds)
+        if self.match_store:
+            with MatchStore(self.match_store) as store:
+                run_id = store.start_run(path, self.target_file, self.thresholds['company_name'])
+                reports.write_report(store.record_matches(run_id, company_matches), path, self.target_file,
+                                     self.formats, output_base)
+        else:
+            reports.write_report(company_matches, path, self.target_file, self.formats, output_base)
+        print(f"Matched {os.path.basename(path)} in {time.perf_counter() - started:.1f}s")
+
+    def run(self):
+        while True:
+            path = self.work_queue.get()
+            try:
+                if path is None:
+                    return
+                if not os.path.exists(path):
+                    continue
+                inbox = os.path.dirname(path)
+                try:
+                    self.process(path)
+                    move_into(path, os.path.join(inbox, PROCESSED_DIR))
+                except Exception as e:
+                    print(f"Error matching {path}: {e}")
+                    move_into(path, os.path.join(inbox, FAILED_DIR))
+            finally:
+                self.work_queue.task_done()
+
+
+def watch(inbox: str, outbox: str, target_file: str, thresholds: Dict[str, int], formats=('txt',),
+          match_store: Optional[str] = MATCH_STORE_FILE, quiet_seconds: float = QUIET_SECONDS,
+          max_queued: int = MAX_QUEUED_FILES, stop_event: Optional[threading.Event] = None):
+    """Run until interrupted (or stop_event is set), matching each file that lands in the inbox"""
+    os.makedirs(inbox, exist_ok=True)
+    os.makedirs(outbox, exist_ok=True)
+
+    work_queue = queue.Queue(maxsize=max_queued)
+    debouncer = Debouncer(work_queue, inbox, quiet_seconds)
+    worker = MatchWorker(work_queue, target_file, thresholds, outbox, list(formats), match_store)
+
+    # Warm the index before the first file arrives
+    worker.target_index()
+    worker_thread = threading.Thread(target=worker.run, name="match-worker", daemon=True)
+    debounce_thread = threading.Thread(target=debouncer.run, name="debouncer", daemon=True)
+    worker_thread.start()
+    debounce_thread.start()
+
+    observer = Observer()
+    observer.schedule(InboxHandler(debouncer), inbox, recursive=False)
+    observer.start()
+
+    # Files dropped while the daemon was down
+    for name in sorted(os.listdir(inbox)):
+        debouncer.touch(os.path.join(inbox, name))
+
+    print(f"Watching {os.path.abspath(inbox)} (Ctrl+C to stop)...")
+    stop_event = stop_event or threading.Event()
+    try:
+        while not stop_event.wait(1):
+            pass
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        observer.stop()
+        observer.join()
+        debouncer.stop()
+        debounce_thread.join()
+        # Let the worker finish whatever is already queued
+        work_queue.put(None)
+        worker_thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match contact exports as they are dropped into a folder")
+    parser.add_argument('--inbox', default='inbox', help="Folder to watch for new contact files")
+    parser.add_argument('--outbox', default='outbox', help="Folder reports are written to")
+    parser.add_argument('--target', help="Target file (default: target_file from the settings file)")
+    parser.add_argument('--settings', default=SETTINGS_FILE, help="Settings file with thresholds")
+    parser.add_argument('--quiet-seconds', type=float, default=QUIET_SECONDS,
+                        help="Seconds a file must stay unchanged before it is matched")
+    parser.add_argument('--max-queued', type=int, default=MAX_QUEUED_FILES,
+                        help="Files queued before the watcher waits for the matcher")
+    args = parser.parse_args()
+
+    settings = load_settings(args.settings) or {}
+    target_file = args.target or settings.get('target_file')
+    if not target_file or 'thresholds' not in settings:
+        parser.error(f"Need a target file and thresholds; run leadmatcher5000.py to create {args.settings}")
+
+    watch(args.inbox, args.outbox, target_file, settings['thresholds'],
+          formats=settings.get('output_formats', ['txt']),
+          match_store=settings.get('match_store', MATCH_STORE_FILE),
+          quiet_seconds=args.quiet_seconds, max_queued=args.max_queued)
+
+
+if __name__ == "__main__":
+    main()